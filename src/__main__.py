@@ -3,18 +3,62 @@ import argparse
 from .gameapp import GameApp
 
 
+def resolution(text):
+    try:
+        w, h = map(int, text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected WIDTHxHEIGHT, got {text!r}') from None
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError(f'resolution must be positive, got {text!r}')
+    return w, h
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--platform-editor', action='store_true')
+    parser.add_argument('--brain', default=None, help='population checkpoint to drive enemies with')
+    parser.add_argument('--ai-thread', action='store_true', help='run enemy AI in a worker thread')
+    parser.add_argument('--level', default=None, help='level file (.json, or .tjl for binary)')
+    parser.add_argument(
+        '--renderer',
+        choices=('surface', 'texture'),
+        default=None,
+        help='render backend: software blits (default) or SDL textures',
+    )
+    parser.add_argument(
+        '--asset-stats', action='store_true', help='print blit cost of loaded assets on exit'
+    )
+    parser.add_argument(
+        '--resolution',
+        type=resolution,
+        default=None,
+        help='fixed world resolution WIDTHxHEIGHT, upscaled to the window',
+    )
     args = parser.parse_args()
 
+    kwargs = {}
+    if args.level is not None:
+        kwargs['level_path'] = args.level
+    if args.renderer is not None and not args.platform_editor:
+        kwargs['renderer'] = args.renderer
+    if args.resolution is not None and not args.platform_editor:
+        kwargs['resolution'] = args.resolution
     if args.platform_editor:
         global GameApp
         from .platformeditor import GameApp
+    elif args.brain is not None:
+        from .checkpoint import load_best_perceptron
+
+        kwargs['ai_brain'] = load_best_perceptron(args.brain)
+        kwargs['ai_thread'] = args.ai_thread
 
     pygame.init()
-    app = GameApp()
+    app = GameApp(**kwargs)
     app.run()
+    if args.asset_stats:
+        from .util import asset_stats, format_asset_stats
+
+        print(format_asset_stats(asset_stats()))
     pygame.quit()
 
 
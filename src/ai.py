@@ -1,5 +1,15 @@
+import threading
+import time
+
 import numpy as np
 
+# Действия врага - индексы выходов нейросети
+ACTION_LEFT = 0
+ACTION_RIGHT = 1
+ACTION_JUMP = 2
+
+STATE_SIZE = 5  # Размер вектора состояния из EnemyAI.get_game_state
+
 
 class Perceptron:
     def __init__(self, input_size, hidden_size, output_size):
@@ -11,6 +21,16 @@ class Perceptron:
         self.weights2 = np.random.randn(hidden_size, output_size) * 0.1
         self.bias2 = np.zeros(output_size)
 
+    @classmethod
+    def from_weights(cls, weights1, bias1, weights2, bias2):
+        """Создает сеть поверх готовых массивов (без копирования, например из Population)"""
+        perceptron = cls.__new__(cls)
+        perceptron.weights1 = weights1
+        perceptron.bias1 = bias1
+        perceptron.weights2 = weights2
+        perceptron.bias2 = bias2
+        return perceptron
+
     def relu(self, x):
         """Функция активации - делает сеть 'нелинейной'"""
         return np.maximum(0, x)
@@ -31,66 +51,112 @@ class Perceptron:
         return self.softmax(output)
 
 
-class GeneticTrainer:
-    def __init__(self, population_size=10, input_size=5, output_size=3):
-        # Создаем популяцию нейросетей
-        self.population = [Perceptron(input_size, 8, output_size) for _ in range(population_size)]
-        self.scores = [0] * population_size  # Результаты каждой сети
-
-    def mutate(self, network, mutation_rate=0.1):
-        """Случайно изменяем веса сети (мутация)"""
-        # Мутируем первые веса
-        mask = np.random.random(network.weights1.shape) < mutation_rate
-        network.weights1 += mask * np.random.randn(*network.weights1.shape) * 0.1
-
-        # Мутируем вторые веса
-        mask = np.random.random(network.weights2.shape) < mutation_rate
-        network.weights2 += mask * np.random.randn(*network.weights2.shape) * 0.1
-
-        return network
-
-    def crossover(self, parent1, parent2):
-        """Смешиваем две сети (скрещивание)"""
-        child = Perceptron(
-            parent1.weights1.shape[0], parent1.weights1.shape[1], parent1.weights2.shape[1]
-        )
+class Population:
+    def __init__(self, size, input_size=5, hidden_size=8, output_size=3, rng=None):
+        """
+        Популяция нейросетей одной формы в виде сложенных тензоров (P, ...)
+
+        Мутация, скрещивание и отбор делаются одной векторной операцией на всю
+        популяцию, а предсказание - батчевым matmul сразу для всех P сетей.
+
+        Args:
+            size: количество сетей P
+            input_size, hidden_size, output_size: размеры слоев
+            rng: numpy.random.Generator; по умолчанию новый
+        """
+        self.rng = np.random.default_rng() if rng is None else rng
 
-        # Скрещиваем веса (берем половину от каждого родителя)
-        crossover_point = parent1.weights1.size // 2
-        child.weights1 = np.where(
-            np.arange(parent1.weights1.size).reshape(parent1.weights1.shape) < crossover_point,
-            parent1.weights1,
-            parent2.weights1,
+        self.weights1 = self.rng.standard_normal((size, input_size, hidden_size)) * 0.1
+        self.bias1 = np.zeros((size, hidden_size))
+        self.weights2 = self.rng.standard_normal((size, hidden_size, output_size)) * 0.1
+        self.bias2 = np.zeros((size, output_size))
+
+        # Маски скрещивания: первая половина весов от первого родителя
+        self._crossover_masks = tuple(
+            (np.arange(t[0].size) < t[0].size // 2).reshape(t[0].shape) for t in self.tensors
         )
 
-        return child
+    @property
+    def tensors(self):
+        return self.weights1, self.bias1, self.weights2, self.bias2
 
-    def evolve(self):
-        """Создаем новое поколение сетей"""
-        # Сортируем сети по результатам
-        sorted_indices = np.argsort(self.scores)[::-1]  # От лучших к худшим
+    def __len__(self):
+        return len(self.weights1)
 
-        new_population = []
+    def perceptron(self, index):
+        """Сеть с номером index; ее веса - представления тензоров популяции"""
+        return Perceptron.from_weights(*(t[index] for t in self.tensors))
 
-        # Берем лучшие сети без изменений
-        for i in range(len(self.population) // 2):
-            new_population.append(self.population[sorted_indices[i]])
+    def predict(self, inputs):
+        """
+        Проход сразу через все P сетей
+
+        Args:
+            inputs: (P, input_size) - по одному входу на сеть,
+                или (P, B, input_size) - по батчу из B входов на сеть
+
+        Returns:
+            np.ndarray: вероятности действий (P, output_size) или (P, B, output_size)
+        """
+        inputs = np.asarray(inputs)
+        single = inputs.ndim == 2
+        if single:
+            inputs = inputs[:, None, :]
+
+        hidden = np.matmul(inputs, self.weights1) + self.bias1[:, None, :]
+        np.maximum(hidden, 0, out=hidden)
+        output = np.matmul(hidden, self.weights2) + self.bias2[:, None, :]
+
+        output -= output.max(axis=-1, keepdims=True)
+        np.exp(output, out=output)
+        output /= output.sum(axis=-1, keepdims=True)
+        return output[:, 0, :] if single else output
+
+    def mutate(self, mutation_rate=0.1, start=0):
+        """Мутирует веса сетей start... (смещения не трогаем)"""
+        for tensor in self.weights1, self.weights2:
+            part = tensor[start:]
+            mask = self.rng.random(part.shape) < mutation_rate
+            part += mask * self.rng.standard_normal(part.shape) * 0.1
+
+    def evolve(self, scores, mutation_rate=0.1):
+        """
+        Новое поколение на месте: лучшая половина остается без изменений, остальные
+        места занимают мутировавшие потомки случайных пар из лучшей половины
+        """
+        size = len(self)
+        elite_count = max(1, size // 2)
+        elite = np.argsort(scores)[::-1][:elite_count]  # От лучших к худшим
+
+        parents1 = elite[self.rng.integers(0, elite_count, size - elite_count)]
+        parents2 = elite[self.rng.integers(0, elite_count, size - elite_count)]
+
+        for tensor, mask in zip(self.tensors, self._crossover_masks):
+            children = np.where(mask, tensor[parents1], tensor[parents2])
+            tensor[:elite_count] = tensor[elite]
+            tensor[elite_count:] = children
+
+        self.mutate(mutation_rate, start=elite_count)
 
-        # Создаем новые сети скрещиванием и мутацией
-        for i in range(len(self.population) // 2):
-            parent1 = self.population[
-                sorted_indices[np.random.randint(0, len(self.population) // 2)]
-            ]
-            parent2 = self.population[
-                sorted_indices[np.random.randint(0, len(self.population) // 2)]
-            ]
 
-            child = self.crossover(parent1, parent2)
-            child = self.mutate(child)
-            new_population.append(child)
+class GeneticTrainer:
+    def __init__(
+        self, population_size=10, input_size=5, output_size=3, hidden_size=8, seed=None
+    ):
+        # Создаем популяцию нейросетей (тензоры + сети-представления поверх них)
+        self.rng = np.random.default_rng(seed)
+        self.tensor = Population(population_size, input_size, hidden_size, output_size, self.rng)
+        self.population = [self.tensor.perceptron(i) for i in range(population_size)]
+        self.scores = np.zeros(population_size)  # Результаты каждой сети
+        self.generation = 0
 
-        self.population = new_population
-        self.scores = [0] * len(self.population)
+    def evolve(self):
+        """Создаем новое поколение сетей"""
+        # Отбор, скрещивание и мутация сразу для всей популяции; сети из
+        # self.population - представления тензоров и обновляются вместе с ними
+        self.tensor.evolve(self.scores)
+        self.scores = np.zeros(len(self.population))
+        self.generation += 1
 
 
 class EnemyAI:
@@ -100,21 +166,7 @@ class EnemyAI:
 
     def get_game_state(self, enemy, player, platforms):
         """Преобразуем игровую ситуацию в числа"""
-        # Нормализованные данные (все от 0 до 1)
-        return np.array(
-            [
-                # Расстояние до игрока по X (нормализованное)
-                (player.rect.centerx - enemy.rect.centerx) / 1000.0,
-                # Расстояние до игрока по Y
-                (player.rect.centery - enemy.rect.centery) / 1000.0,
-                # Стоит ли на земле (0 или 1)
-                1.0 if enemy.is_grounded else 0.0,
-                # Скорость по X (нормализованная)
-                enemy.velocity.x / 500.0,
-                # Скорость по Y
-                enemy.velocity.y / 500.0,
-            ]
-        )
+        return np.array(state_row(enemy, player))
 
     def decide_action(self, enemy, player, platforms):
         """Принимаем решение на основе нейросети"""
@@ -126,7 +178,7 @@ class EnemyAI:
 
         # 10% случайности для исследования
         if np.random.random() < 0.1:
-            action = np.random.randint(0, len(action_probs) - 1)
+            action = np.random.randint(0, len(action_probs))
         else:
             action = np.argmax(action_probs)
 
@@ -134,6 +186,367 @@ class EnemyAI:
         return action
 
 
+def chase_target(enemy, player, navigation=None):
+    """
+    Куда идти врагу: к центру игрока или, если задан граф навигации,
+    к следующей точке пути до игрока (в координатах центра врага)
+    """
+    if navigation is not None:
+        waypoint = navigation.next_waypoint(enemy.rect.midbottom, player.rect.midbottom)
+        if waypoint is not None:
+            return waypoint.x, waypoint.y - enemy.rect.height / 2
+    return player.rect.center
+
+
+def state_row(enemy, player, navigation=None):
+    """Состояние игры для одного врага в виде кортежа из STATE_SIZE чисел"""
+    target_x, target_y = chase_target(enemy, player, navigation)
+    # Нормализованные данные (все от 0 до 1)
+    return (
+        # Расстояние до цели (игрока или точки пути к нему) по X (нормализованное)
+        (target_x - enemy.rect.centerx) / 1000.0,
+        # Расстояние до цели по Y
+        (target_y - enemy.rect.centery) / 1000.0,
+        # Стоит ли на земле (0 или 1)
+        1.0 if enemy.is_grounded else 0.0,
+        # Скорость по X (нормализованная)
+        enemy.velocity.x / 500.0,
+        # Скорость по Y
+        enemy.velocity.y / 500.0,
+    )
+
+
+class BatchedEnemyAI:
+    def __init__(self, perceptron, capacity=64, exploration=0.1, rng=None, navigation=None):
+        """
+        Решения сразу для всех врагов одним проходом нейросети
+
+        Состояния всех врагов собираются в одну заранее выделенную матрицу (N, 5)
+        float32, и сеть считается двумя матричными умножениями на весь батч.
+
+        Args:
+            perceptron: общая для всех врагов нейросеть
+            capacity: начальный размер буферов (растет удвоением при нехватке)
+            exploration: вероятность случайного действия (как в EnemyAI)
+            rng: numpy.random.Generator; по умолчанию новый
+            navigation: NavigationGraph уровня - враги идут по пути к игроку,
+                а не напрямую (None - напрямую)
+        """
+        self.exploration = exploration
+        self.navigation = navigation
+        self.rng = np.random.default_rng() if rng is None else rng
+        self._capacity = capacity
+        self.set_brain(perceptron)
+
+    def set_brain(self, perceptron):
+        """Меняет нейросеть (веса копируются во float32)"""
+        self.brain = perceptron
+        self._w1 = perceptron.weights1.astype(np.float32)
+        self._b1 = perceptron.bias1.astype(np.float32)
+        self._w2 = perceptron.weights2.astype(np.float32)
+        self._b2 = perceptron.bias2.astype(np.float32)
+        self._allocate(self._capacity)
+
+    def _allocate(self, capacity):
+        self._capacity = capacity
+        self._states = np.zeros((capacity, STATE_SIZE), np.float32)
+        self._hidden = np.zeros((capacity, self._w1.shape[1]), np.float32)
+        self._output = np.zeros((capacity, self._w2.shape[1]), np.float32)
+        self._row_buf = np.zeros((capacity, 1), np.float32)
+
+    def state_buffer(self, n):
+        """Представление (n, 5) матрицы состояний (буферы растут при нехватке)"""
+        if n > self._capacity:
+            self._allocate(max(n, 2 * self._capacity))
+        return self._states[:n]
+
+    def collect_states(self, enemies, player):
+        """Заполняет матрицу состояний; возвращает ее представление (N, 5) без копирования"""
+        n = len(enemies)
+        states = self.state_buffer(n)
+        if n:
+            states[:] = [state_row(enemy, player, self.navigation) for enemy in enemies]
+        return states
+
+    def predict(self, states):
+        """
+        Батчевый проход сети: ReLU(states @ W1 + b1) @ W2 + b2 и softmax по строкам
+
+        Returns:
+            np.ndarray: вероятности действий (N, output_size); это представление
+            внутреннего буфера, оно перезаписывается следующим вызовом
+        """
+        n = len(states)
+        hidden = self._hidden[:n]
+        output = self._output[:n]
+        row_buf = self._row_buf[:n]
+
+        np.matmul(states, self._w1, out=hidden)
+        hidden += self._b1
+        np.maximum(hidden, 0, out=hidden)
+
+        np.matmul(hidden, self._w2, out=output)
+        output += self._b2
+
+        np.max(output, axis=1, keepdims=True, out=row_buf)
+        output -= row_buf
+        np.exp(output, out=output)
+        np.sum(output, axis=1, keepdims=True, out=row_buf)
+        output /= row_buf
+        return output
+
+    def decide_actions(self, enemies, player):
+        """
+        Принимает решения для всех врагов сразу
+
+        Returns:
+            np.ndarray: действия (N,) - индексы ACTION_*
+        """
+        return self.choose_actions(self.collect_states(enemies, player))
+
+    def choose_actions(self, states):
+        """Действия по готовой матрице состояний (N, 5)"""
+        n = len(states)
+        action_probs = self.predict(states)
+
+        actions = action_probs.argmax(axis=1)
+        # Случайность для исследования, с тем же распределением, что и в EnemyAI
+        explore = self.rng.random(n) < self.exploration
+        random_actions = self.rng.integers(0, action_probs.shape[1], n)
+        np.copyto(actions, random_actions, where=explore)
+        return actions
+
+
+class AIScheduler:
+    def __init__(self, batched_ai, rate=10.0, budget=0.002, chunk_size=16):
+        """
+        Планировщик решений ИИ с фиксированной частотой, не зависящей от FPS
+
+        Каждый враг принимает решение rate раз в секунду, но враги разнесены по
+        кадрам: за кадр обрабатывается примерно rate * N * dt врагов по кругу,
+        так что нагрузка ровная. Между решениями враг повторяет last_action.
+
+        Args:
+            batched_ai: BatchedEnemyAI, считающий решения пачками
+            rate: частота решений одного врага, Гц
+            budget: время на решения за кадр, с; что не успели - переносится
+                на следующий кадр (None - без ограничения, полностью детерминированно)
+            chunk_size: размер пачки, после которой проверяется бюджет
+        """
+        self.ai = batched_ai
+        self.rate = rate
+        self.budget = budget
+        self.chunk_size = chunk_size
+
+        self._cursor = 0  # Следующий по кругу враг
+        self._due = 0.0  # Накопленные, но еще не принятые решения
+
+    @property
+    def pending(self):
+        """Сколько решений отложено на следующие кадры"""
+        return int(self._due)
+
+    def update(self, dt, enemies, player):
+        """
+        Принимает решения, положенные на этот кадр, и применяет действия ко всем врагам
+
+        Args:
+            dt: длительность кадра, с
+            enemies: список врагов (порядок должен быть стабильным между кадрами)
+            player: игрок
+
+        Returns:
+            int: сколько решений принято в этом кадре
+        """
+        count = len(enemies)
+        if not count:
+            self._due = 0.0
+            return 0
+
+        # Больше одного полного круга копить незачем
+        self._due = min(self._due + self.rate * count * dt, count)
+        deadline = None if self.budget is None else time.perf_counter() + self.budget
+
+        decided = 0
+        while self._due >= 1:
+            if self._cursor >= count:
+                self._cursor = 0
+            chunk_count = min(int(self._due), self.chunk_size, count - self._cursor)
+            chunk = enemies[self._cursor : self._cursor + chunk_count]
+
+            for enemy, action in zip(chunk, self.ai.decide_actions(chunk, player)):
+                enemy.act(action)
+
+            self._cursor += chunk_count
+            self._due -= chunk_count
+            decided += chunk_count
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        # Между решениями враги повторяют последнее действие (повтор их не будит)
+        for enemy in enemies:
+            if enemy.last_action is not None:
+                enemy.act(enemy.last_action)
+
+        return decided
+
+
+class _Snapshot:
+    """Компактный снимок мира для ИИ: центры, цели, скорости и флаги опоры врагов"""
+
+    def __init__(self, capacity):
+        self.tick = -1
+        self.count = 0
+        self.enemies = ()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.positions = np.zeros((capacity, 2), np.float32)
+        self.targets = np.zeros((capacity, 2), np.float32)
+        self.velocities = np.zeros((capacity, 2), np.float32)
+        self.grounded = np.zeros(capacity, np.float32)
+
+    def fill(self, tick, enemies, player, navigation=None):
+        count = len(enemies)
+        if count > len(self.positions):
+            self._allocate(max(count, 2 * len(self.positions)))
+
+        self.positions[:count] = [enemy.rect.center for enemy in enemies]
+        self.velocities[:count] = [enemy.velocity for enemy in enemies]
+        self.grounded[:count] = [enemy.is_grounded for enemy in enemies]
+        # Поиск пути - в главном потоке: граф меняется только в нем
+        self.targets[:count] = [chase_target(enemy, player, navigation) for enemy in enemies]
+        self.enemies = tuple(enemies)
+        self.count = count
+        self.tick = tick
+
+    def write_states(self, out):
+        """Считает матрицу состояний (как state_row) векторно, без обращения к спрайтам"""
+        count = self.count
+        np.subtract(self.targets[:count], self.positions[:count], out=out[:, 0:2])
+        out[:, 0:2] /= 1000.0
+        out[:, 2] = self.grounded[:count]
+        np.divide(self.velocities[:count], 500.0, out=out[:, 3:5])
+        return out
+
+
+class AIWorker:
+    def __init__(self, batched_ai, threaded=True, capacity=64):
+        """
+        Решения ИИ в отдельном потоке, параллельно с отрисовкой
+
+        Каждый тик главный цикл записывает снимок мира в свободную половину двойного
+        буфера и публикует его, а поток считает по нему действия (NumPy отпускает GIL).
+        Действия применяются на следующем тике, то есть с задержкой в один тик.
+        Если поток не успевает, промежуточные снимки пропускаются, а враги
+        повторяют last_action.
+
+        Обмен данными обходится без блокировок: опубликованный снимок меняется
+        одним присваиванием индекса, а читаемый потоком снимок помечается в _reading
+        и главный цикл его не перезаписывает. Результаты публикуются неизменяемым
+        кортежем. Event нужен только чтобы будить поток.
+
+        С threaded=False тот же снимок обрабатывается сразу в главном потоке, с той же
+        задержкой в один тик - игра полностью детерминирована.
+
+        Args:
+            batched_ai: BatchedEnemyAI; пока работает поток, пользоваться им может только он
+            threaded: считать в отдельном потоке
+            capacity: начальная вместимость снимков
+        """
+        self.ai = batched_ai
+        self.threaded = threaded
+
+        self._slots = (_Snapshot(capacity), _Snapshot(capacity))
+        self._published = None  # Индекс последнего опубликованного снимка
+        self._reading = None  # Индекс снимка, который сейчас читает поток
+        self._result = None  # (тик, враги, действия)
+        self._tick = 0
+        self._processed_tick = -1  # Пишет только поток
+        self._applied_tick = -1  # Пишет только главный цикл
+
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name='ai-worker', daemon=True)
+            self._thread.start()
+
+    def update(self, enemies, player):
+        """
+        Применяет действия, посчитанные по прошлому снимку, и публикует новый снимок
+
+        Returns:
+            int: тик снимка, по которому получены примененные действия (-1, если их нет)
+        """
+        decided_tick = self._apply_result(enemies)
+
+        slot = 0 if self._published != 0 else 1
+        if slot != self._reading:
+            self._slots[slot].fill(self._tick, enemies, player, self.ai.navigation)
+            self._published = slot
+            if self.threaded:
+                self._wake.set()
+            else:
+                self._process()
+        self._tick += 1
+
+        return decided_tick
+
+    def _apply_result(self, enemies):
+        result = self._result
+        decided_tick = -1
+        if result is not None and result[0] > self._applied_tick:
+            decided_tick, decided_enemies, actions = result
+            self._applied_tick = decided_tick
+            for enemy, action in zip(decided_enemies, actions):
+                if enemy.alive():
+                    enemy.act(action)
+
+        # Кто не получил нового решения, повторяет последнее (повтор их не будит)
+        for enemy in enemies:
+            if enemy.last_action is not None:
+                enemy.act(enemy.last_action)
+        return decided_tick
+
+    def _process(self):
+        # Помечаем снимок как читаемый и проверяем, что его не успели сменить
+        while True:
+            slot = self._published
+            if slot is None:
+                return
+            self._reading = slot
+            if self._published == slot:
+                break
+
+        snapshot = self._slots[slot]
+        try:
+            if snapshot.tick <= self._processed_tick:
+                return
+            states = snapshot.write_states(self.ai.state_buffer(snapshot.count))
+            actions = self.ai.choose_actions(states).copy()
+            self._processed_tick = snapshot.tick
+            self._result = (snapshot.tick, snapshot.enemies, actions)
+        finally:
+            self._reading = None
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopped:
+                return
+            self._process()
+
+    def close(self):
+        """Останавливает поток"""
+        self._stopped = True
+        if self._thread is not None:
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+
 class RewardSystem:
     def __init__(self):
         self.last_distance = float('inf')
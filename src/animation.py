@@ -0,0 +1,94 @@
+import pygame
+
+from .util import get_image
+
+_sheets = {}
+
+
+class FrameSheet:
+    def __init__(self, name, frame_count=1, scale=1):
+        """
+        Кадры анимации из одного изображения
+
+        Изображение делится по горизонтали на frame_count кадров равной ширины;
+        кадры масштабируются и отражаются один раз, при загрузке, и дальше
+        общие для всех спрайтов (см. FrameSheet.get).
+
+        Args:
+            name: изображение в ASSETS_ROOT (как для get_image)
+            frame_count: сколько кадров в изображении
+            scale: масштаб кадров
+        """
+        image = get_image(name)
+        if image is None:
+            raise ValueError(f'cannot load frame sheet {name!r}')
+        width, height = image.get_width() // frame_count, image.get_height()
+        if not width:
+            raise ValueError(f'{name!r} is narrower than {frame_count} frames')
+
+        if frame_count == 1:
+            frames = [image]
+        else:
+            frames = [image.subsurface((i * width, 0, width, height)) for i in range(frame_count)]
+        if scale != 1:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            frames = [pygame.transform.scale(frame, size) for frame in frames]
+
+        # frames[False] - как в изображении (вправо), frames[True] - отраженные (влево)
+        self.frames = (
+            tuple(frames),
+            tuple(pygame.transform.flip(frame, True, False) for frame in frames),
+        )
+
+    @classmethod
+    def get(cls, name, frame_count=1, scale=1):
+        """Общий для всех экземпляр FrameSheet с такими параметрами"""
+        key = (name, frame_count, scale)
+        sheet = _sheets.get(key)
+        if sheet is None:
+            sheet = _sheets[key] = cls(name, frame_count, scale)
+        return sheet
+
+
+class Animation:
+    def __init__(self, sheet, fps=10, loop=True):
+        """
+        Анимация: кадры FrameSheet с частотой fps
+
+        Args:
+            sheet: FrameSheet
+            fps: кадров в секунду
+            loop: повторять ли анимацию (иначе остается на последнем кадре)
+        """
+        self.frames = sheet.frames
+        self.fps = fps
+        self.loop = loop
+        self.count = len(sheet.frames[0])
+
+    def frame(self, time, flip=False):
+        """Кадр в момент time от начала анимации"""
+        index = int(time * self.fps)
+        index = index % self.count if self.loop else min(index, self.count - 1)
+        return self.frames[flip][index]
+
+
+class Animator:
+    """Состояние анимации одного спрайта: текущая анимация и время от ее начала"""
+
+    __slots__ = ('clip', 'time')
+
+    def __init__(self, clip):
+        self.clip = clip
+        self.time = 0.0
+
+    def play(self, clip):
+        """Переключает анимацию; та же анимация продолжается, а не начинается заново"""
+        if clip is not self.clip:
+            self.clip = clip
+            self.time = 0.0
+
+    def advance(self, dt):
+        self.time += dt
+
+    def frame(self, flip=False):
+        return self.clip.frame(self.time, flip)
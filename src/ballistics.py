@@ -0,0 +1,162 @@
+import math
+
+import numpy as np
+from pygame import Vector2
+
+GRAVITY = 980  # Как Physical.gravity, px/s**2
+# Spear.initial_speed (500) на первом же шаге обрезается Physical.max_speed (300),
+# так что реальная скорость броска - 300 px/s
+SPEAR_SPEED = 300
+
+
+def launch_angles(start, target, speed=SPEAR_SPEED, gravity=GRAVITY):
+    """
+    Углы броска, при которых снаряд попадает из start в target
+
+    Считается идеальная парабола: ось y направлена вниз, как на экране, а угол -
+    в градусах, как в Vector2.as_polar (0 - вправо, -90 - вверх). Physical.update
+    ограничивает скорость и на спуске, поэтому настоящее копье падает чуть
+    круче; для настильного броска разница мала.
+
+    Args:
+        start, target: точки (x, y)
+        speed: начальная скорость, px/s
+        gravity: ускорение свободного падения (вниз), px/s**2
+
+    Returns:
+        tuple[float, float] | None: (настильный угол, навесной угол) или None,
+        если цель вне досягаемости
+    """
+    dx = target[0] - start[0]
+    rise = start[1] - target[1]  # Высота цели над стартом (вверх - положительно)
+    v2 = speed * speed
+
+    discriminant = v2 * v2 - gravity * (gravity * dx * dx + 2 * rise * v2)
+    if discriminant < 0 or not speed:
+        return None
+
+    root = math.sqrt(discriminant)
+    low = -math.degrees(math.atan2(v2 - root, gravity * dx))
+    high = -math.degrees(math.atan2(v2 + root, gravity * dx))
+    return low, high
+
+
+def launch_velocity(angle, speed=SPEAR_SPEED):
+    """Вектор начальной скорости для угла из launch_angles"""
+    velocity = Vector2()
+    velocity.from_polar((speed, angle))
+    return velocity
+
+
+def launch_angles_batch(starts, targets, speed=SPEAR_SPEED, gravity=GRAVITY):
+    """
+    launch_angles сразу для многих пар точек одним вызовом NumPy
+
+    Args:
+        starts, targets: массивы (N, 2)
+        speed: скорость (число или массив (N,))
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: настильные и навесные углы (N,);
+        для недосягаемых целей - NaN
+    """
+    starts = np.asarray(starts, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    dx = targets[:, 0] - starts[:, 0]
+    rise = starts[:, 1] - targets[:, 1]
+    v2 = np.square(speed, dtype=float)
+
+    discriminant = v2 * v2 - gravity * (gravity * dx * dx + 2 * rise * v2)
+    with np.errstate(invalid='ignore'):
+        root = np.sqrt(discriminant)  # NaN для недосягаемых целей
+    low = -np.degrees(np.arctan2(v2 - root, gravity * dx))
+    high = -np.degrees(np.arctan2(v2 + root, gravity * dx))
+    return low, high
+
+
+def flight_times(starts, targets, angles, speed=SPEAR_SPEED, gravity=GRAVITY):
+    """Время полета до цели (N,) по углам из launch_angles_batch"""
+    starts = np.asarray(starts, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    radians = np.radians(angles)
+    vx = speed * np.cos(radians)
+    vy = speed * np.sin(radians)
+    dx = targets[:, 0] - starts[:, 0]
+    dy = targets[:, 1] - starts[:, 1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Почти вертикальный бросок: время по высоте (поздний корень - снаряд на спуске)
+        vertical = (-vy + np.sqrt(vy * vy + 2 * gravity * dy)) / gravity
+        return np.where(np.abs(vx) > 1e-6, dx / vx, vertical)
+
+
+def arc_points(starts, angles, times, speed=SPEAR_SPEED, gravity=GRAVITY, samples=8):
+    """
+    Точки траекторий (N, samples + 1, 2) от старта до момента times
+
+    Args:
+        starts: массив (N, 2)
+        angles: углы броска (N,), градусы
+        times: время полета (N,)
+    """
+    starts = np.asarray(starts, dtype=float)
+    radians = np.radians(angles)
+    t = np.asarray(times, dtype=float)[:, None] * np.linspace(0, 1, samples + 1)
+    xs = starts[:, :1] + speed * np.cos(radians)[:, None] * t
+    ys = starts[:, 1:] + speed * np.sin(radians)[:, None] * t + gravity * t * t / 2
+    return np.stack((xs, ys), axis=-1)
+
+
+def arcs_clear(world, starts, targets, angles, speed=SPEAR_SPEED, gravity=GRAVITY, samples=8):
+    """
+    Не задевает ли траектория неподвижную геометрию
+
+    Дуга приближается ломаной из samples отрезков, и все отрезки всех дуг
+    проверяются одним вызовом CollisionWorld.line_of_sight_batch.
+
+    Args:
+        world: CollisionWorld уровня
+        starts, targets: массивы (N, 2)
+        angles: углы броска (N,); NaN (цель недосягаема) дает False
+
+    Returns:
+        np.ndarray: bool (N,)
+    """
+    angles = np.asarray(angles, dtype=float)
+    reachable = ~np.isnan(angles)
+    clear = np.zeros(len(angles), dtype=bool)
+    if not reachable.any():
+        return clear
+
+    starts = np.asarray(starts, dtype=float)[reachable]
+    targets = np.asarray(targets, dtype=float)[reachable]
+    angles = angles[reachable]
+
+    times = flight_times(starts, targets, angles, speed, gravity)
+    points = arc_points(starts, angles, times, speed, gravity, samples)
+    segments = np.concatenate((points[:, :-1], points[:, 1:]), axis=-1).reshape(-1, 4)
+    visible = world.line_of_sight_batch(segments).reshape(len(angles), samples)
+    clear[reachable] = visible.all(axis=1)
+    return clear
+
+
+def aim(start, target, world=None, speed=SPEAR_SPEED, gravity=GRAVITY, prefer_high=False):
+    """
+    Направление броска в цель или None
+
+    Пробует настильную траекторию, затем навесную (или наоборот при prefer_high);
+    если задан world, отбрасывает траектории, задевающие геометрию уровня.
+
+    Returns:
+        Vector2 | None: единичный вектор направления (для Player.throw_spear)
+    """
+    angles = launch_angles(start, target, speed, gravity)
+    if angles is None:
+        return None
+    if prefer_high:
+        angles = angles[::-1]
+
+    for angle in angles:
+        if world is None or arcs_clear(world, [start], [target], [angle], speed, gravity)[0]:
+            return launch_velocity(angle, 1)
+    return None
@@ -19,6 +19,12 @@ class Camera:
         self.smoothness = 0.05
         self.dead_zone = 50  # Зона, в которой камера не двигается
 
+    def resize(self, width, height):
+        """Меняет размер области видимости; camera_rect - всегда реально видимая область"""
+        self.width = width
+        self.height = height
+        self.camera_rect.size = (width, height)
+
     def set_target(self, target):
         """Устанавливает целевой объект"""
         self.target = target
@@ -0,0 +1,145 @@
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from .ai import GeneticTrainer, Perceptron
+
+MAGIC = b'TJCK'
+VERSION = 1
+
+# Порядок тензоров в файле; совпадает с Population.tensors
+_TENSORS = ('weights1', 'bias1', 'weights2', 'bias2')
+
+
+def _align(offset):
+    return (offset + 63) // 64 * 64
+
+
+def save_population(path, trainer: GeneticTrainer):
+    """
+    Сохраняет популяцию, ее результаты, номер поколения и состояние RNG
+
+    Вызывать до trainer.evolve(): evolve заменяет популяцию и обнуляет scores.
+
+    Формат: MAGIC, длина заголовка (uint32), JSON-заголовок с формами и смещениями,
+    затем сырые массивы, выровненные по 64 байта. Файл пишется во временный
+    и атомарно подменяет старый, так что падение посреди записи ничего не портит.
+    """
+    path = Path(path)
+    arrays = [np.ascontiguousarray(t) for t in trainer.tensor.tensors]
+    arrays.append(np.ascontiguousarray(trainer.scores, dtype=np.float64))
+    names = (*_TENSORS, 'scores')
+
+    best = int(np.argmax(trainer.scores))
+
+    header = {
+        'version': VERSION,
+        'generation': trainer.generation,
+        'best': best,
+        'rng': trainer.rng.bit_generator.state,
+        'arrays': {},
+    }
+
+    # Смещения зависят от длины заголовка, а она - от смещений: подбираем размер
+    # заголовка с запасом, пока все не поместится, и добиваем его пробелами
+    def layout(header_size):
+        offset = _align(len(MAGIC) + 4 + header_size)
+        for name, array in zip(names, arrays):
+            header['arrays'][name] = {
+                'shape': array.shape,
+                'dtype': array.dtype.str,
+                'offset': offset,
+            }
+            offset = _align(offset + array.nbytes)
+        return json.dumps(header).encode()
+
+    header_size = 0
+    encoded = layout(header_size)
+    while len(encoded) > header_size:
+        header_size = len(encoded) + 64
+        encoded = layout(header_size)
+    encoded = encoded.ljust(header_size)
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(encoded)))
+        f.write(encoded)
+        for name, array in zip(names, arrays):
+            f.seek(header['arrays'][name]['offset'])
+            f.write(memoryview(array).cast('B'))
+    os.replace(tmp_path, path)
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a population checkpoint')
+        (size,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(size))
+    if header['version'] != VERSION:
+        raise ValueError(f'{path}: unsupported checkpoint version {header["version"]}')
+    return header
+
+
+def _open_arrays(path, header):
+    """Отображает массивы файла в память; данные читаются только при обращении"""
+    arrays = {}
+    for name, info in header['arrays'].items():
+        arrays[name] = np.memmap(
+            path, np.dtype(info['dtype']), 'r', info['offset'], tuple(info['shape'])
+        )
+    return arrays
+
+
+def load_population(path) -> GeneticTrainer:
+    """Загружает популяцию целиком (для продолжения обучения)"""
+    header = _read_header(path)
+    arrays = _open_arrays(path, header)
+
+    population_size, input_size, hidden_size = arrays['weights1'].shape
+    output_size = arrays['weights2'].shape[2]
+    trainer = GeneticTrainer(population_size, input_size, output_size, hidden_size)
+
+    for name, tensor in zip(_TENSORS, trainer.tensor.tensors):
+        tensor[...] = arrays[name]
+    trainer.scores[:] = arrays['scores']
+    trainer.generation = header['generation']
+    trainer.rng.bit_generator.state = header['rng']
+    return trainer
+
+
+def load_best_perceptron(path) -> Perceptron:
+    """
+    Загружает только лучшую сеть популяции (для EnemyAI в игре)
+
+    Остальная популяция не читается: из отображенного файла копируется
+    одна строка каждого тензора.
+    """
+    header = _read_header(path)
+    arrays = _open_arrays(path, header)
+    best = header['best']
+    return Perceptron.from_weights(*(np.array(arrays[name][best]) for name in _TENSORS))
+
+
+class Checkpointer:
+    def __init__(self, path, every=10):
+        """
+        Периодическое сохранение популяции во время обучения
+
+        Args:
+            path: файл чекпоинта
+            every: сохранять раз в столько поколений
+        """
+        self.path = Path(path)
+        self.every = every
+
+    def maybe_save(self, trainer, force=False):
+        """Сохраняет оцененное поколение, если пришло время (или force); True, если сохранил"""
+        if not force and trainer.generation % self.every:
+            return False
+        save_population(self.path, trainer)
+        return True
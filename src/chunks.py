@@ -0,0 +1,272 @@
+import math
+from array import array
+
+import pygame
+
+from .sprites import Platform
+
+# Записи неактивных чанков (по ENEMY_STRIDE и SPEAR_STRIDE чисел на сущность):
+# враг - x, y, vx, vy, health, last_action (-1 - нет решения), facing (-1 влево, 1 вправо);
+# копье - x, y, vx, vy, angle, is_stuck, owner (1 - игрок, 0 - нет владельца)
+ENEMY_STRIDE = 7
+SPEAR_STRIDE = 7
+
+
+class Chunk:
+    """
+    Квадратная область уровня.
+
+    Платформы хранятся всегда (как аргументы Platform), а враги и копья - только
+    пока чанк неактивен, и не спрайтами, а плоскими массивами чисел.
+    """
+
+    def __init__(self, key, size):
+        self.key = key
+        self.rect = pygame.Rect(key[0] * size, key[1] * size, size, size)
+        self.bounds = self.rect.copy()  # Вместе с выступающими за чанк платформами
+        self.platforms = []  # Аргументы Platform
+        self.sprites = []  # Живые платформы, пока чанк активен
+        self.enemies = array('d')
+        self.spears = array('d')
+        self.is_active = False
+
+
+class ChunkManager:
+    def __init__(
+        self,
+        level,
+        spear_pool,
+        enemy_pool,
+        player=None,
+        chunk_size=512,
+        activate_margin=256,
+        deactivate_margin=512,
+    ):
+        """
+        Подгрузка уровня чанками вокруг камеры
+
+        Уровень делится на квадратные чанки. Чанк активируется, когда попадает
+        в область камеры, расширенную на activate_margin, и выгружается, только
+        когда выходит из области, расширенной на больший deactivate_margin, -
+        так чанки на границе не мигают туда-обратно. Платформа, враг или копье
+        принадлежат чанку своего левого верхнего угла; длинная платформа
+        расширяет границы чанка, чтобы не пропасть, пока видна ее часть. Чанки,
+        которых касается живой враг, активны вместе с его чанком: иначе враг
+        на границе чанков остался бы без опоры и провалился.
+
+        У активного чанка есть живые спрайты платформ, а враги и копья в нем
+        симулируются как обычно. При выгрузке спрайты платформ удаляются,
+        а враги и копья записываются в массивы чанка и возвращаются в пулы;
+        при активации они снова берутся из пулов. Так стоимость кадра зависит
+        от того, что рядом с камерой, а не от размера уровня.
+
+        Args:
+            level: аргументы Platform для всех платформ уровня
+            spear_pool, enemy_pool: EntityPool копий и врагов
+            player: игрок; его копья и после выгрузки чанка не ранят его самого
+                (владельца-врага запись не хранит: спрайт врага уходит в пул)
+            chunk_size: сторона чанка, px
+            activate_margin, deactivate_margin: запас вокруг камеры, px
+        """
+        if deactivate_margin < activate_margin:
+            raise ValueError('deactivate_margin must not be less than activate_margin')
+
+        self.chunk_size = chunk_size
+        self.activate_margin = activate_margin
+        self.deactivate_margin = deactivate_margin
+        self.spear_pool = spear_pool
+        self.enemy_pool = enemy_pool
+        self.player = player
+
+        self.chunks = {}
+        self.active = set()
+        self.platforms = pygame.sprite.Group()  # Платформы активных чанков
+
+        for args in level:
+            chunk = self._chunk_at(args[0], args[1])
+            chunk.platforms.append(args)
+            chunk.bounds.union_ip(pygame.Rect(args[:2], Platform.measure(*args[2:])))
+
+        # На сколько чанков вправо и вниз самые длинные платформы выходят за свой чанк
+        reach_x = reach_y = 0
+        for chunk in self.chunks.values():
+            reach_x = max(reach_x, math.ceil((chunk.bounds.right - chunk.rect.right) / chunk_size))
+            reach_y = max(reach_y, math.ceil((chunk.bounds.bottom - chunk.rect.bottom) / chunk_size))
+        self._reach = (reach_x, reach_y)
+        self._spawned = False  # Появились враги, чьи опоры еще не проверены
+
+    def _key(self, x, y):
+        return (math.floor(x / self.chunk_size), math.floor(y / self.chunk_size))
+
+    def _chunk_at(self, x, y):
+        return self._chunk(self._key(x, y))
+
+    def _chunk(self, key):
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = Chunk(key, self.chunk_size)
+        return chunk
+
+    def _keys_in(self, rect):
+        """Ключи чанков, задевающих rect (с учетом выступающих платформ)"""
+        x0, y0 = self._key(rect.left, rect.top)
+        x1, y1 = self._key(rect.right, rect.bottom)
+        keys = {(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)}
+
+        reach_x, reach_y = self._reach
+        for x in range(x0 - reach_x, x1 + 1):
+            for y in range(y0 - reach_y, y1 + 1):
+                chunk = self.chunks.get((x, y))
+                if chunk is not None and chunk.bounds.colliderect(rect):
+                    keys.add((x, y))
+        return keys
+
+    def update(self, view, enemies, spears):
+        """
+        Активирует и выгружает чанки по положению камеры
+
+        Args:
+            view: область камеры (Camera.camera_rect)
+            enemies: группа врагов
+            spears: группа копий
+
+        Returns:
+            bool: изменился ли набор активных платформ (нужно пересобрать коллайдеры)
+        """
+        inner = pygame.Rect(view).inflate(2 * self.activate_margin, 2 * self.activate_margin)
+        outer = pygame.Rect(view).inflate(2 * self.deactivate_margin, 2 * self.deactivate_margin)
+
+        keep = self._keys_in(outer)
+        if not self.active <= keep:
+            # Чанки, которых касаются остающиеся враги, держим: в них может быть их опора
+            keep = self._with_supports(keep, enemies)
+        to_deactivate = [key for key in self.active if key not in keep]
+        to_activate = [key for key in self._keys_in(inner) if key not in self.active]
+
+        changed = False
+        for key in to_deactivate:
+            changed = self._deactivate(self.chunks[key]) or changed
+        for key in to_activate:
+            changed = self._activate(self._chunk(key), enemies, spears) or changed
+        while self._spawned:
+            # Появившимся врагам нужны и чанки с их опорой, иначе они провалятся
+            self._spawned = False
+            for key in self._with_supports(self.active, enemies) - self.active:
+                changed = self._activate(self._chunk(key), enemies, spears) or changed
+        # Сущности, оказавшиеся в неактивных чанках, засыпают там
+        self._store_inactive(enemies, spears)
+        return changed
+
+    def _with_supports(self, keys, enemies):
+        """
+        Ключи keys вместе с чанками, которых касаются враги из этих чанков
+
+        Враг принадлежит чанку левого верхнего угла, а стоит часто на платформе
+        соседнего чанка (ниже или сбоку); прямоугольник расширяется на пиксель,
+        чтобы захватить платформу, которой враг касается гранью.
+        """
+        keys = set(keys)
+        waiting = list(enemies)
+        while waiting:
+            outside = []
+            for enemy in waiting:
+                if self._key(*enemy.rect.topleft) in keys:
+                    keys |= self._keys_in(enemy.rect.inflate(2, 2))
+                else:
+                    outside.append(enemy)
+            # Враги снаружи нужны, только если их чанк добавился по соседу
+            if len(outside) == len(waiting):
+                break
+            waiting = outside
+        return keys
+
+    def _activate(self, chunk, enemies, spears):
+        chunk.is_active = True
+        self.active.add(chunk.key)
+
+        chunk.sprites = [Platform(*args) for args in chunk.platforms]
+        self.platforms.add(chunk.sprites)
+
+        self._spawn(chunk, enemies, spears)
+        return bool(chunk.sprites)
+
+    def _spawn(self, chunk, enemies, spears):
+        """Достает врагов и копья чанка из пулов по его записям"""
+        for i in range(0, len(chunk.enemies), ENEMY_STRIDE):
+            x, y, vx, vy, health, last_action, facing = chunk.enemies[i : i + ENEMY_STRIDE]
+            enemy = self.enemy_pool.acquire(x, y)
+            enemy.velocity.update(vx, vy)
+            enemy.health = health
+            enemy.last_action = None if last_action < 0 else int(last_action)
+            enemy._facing = 'left' if facing < 0 else 'right'
+            enemy.show_frame()
+            enemies.add(enemy)
+            self._spawned = True
+
+        for i in range(0, len(chunk.spears), SPEAR_STRIDE):
+            x, y, vx, vy, angle, is_stuck, owner = chunk.spears[i : i + SPEAR_STRIDE]
+            spear = self.spear_pool.acquire((x, y), (vx, vy), self.player if owner else None)
+            spear.velocity.update(vx, vy)
+            if angle:
+                spear.rotate(angle)
+                spear.rect.topleft = (x, y)
+            if is_stuck:
+                spear.stick()
+            spears.add(spear)
+
+        del chunk.enemies[:]
+        del chunk.spears[:]
+
+    def save_state(self):
+        """Копия записей врагов и копий неактивных чанков (для WorldSnapshot)"""
+        return {
+            key: (array('d', chunk.enemies), array('d', chunk.spears))
+            for key, chunk in self.chunks.items()
+            if chunk.enemies or chunk.spears
+        }
+
+    def load_state(self, state, enemies, spears):
+        """
+        Заменяет записи чанков сохраненными в save_state
+
+        Записи, попавшие в уже активные чанки, сразу превращаются в спрайты.
+        """
+        for chunk in self.chunks.values():
+            del chunk.enemies[:]
+            del chunk.spears[:]
+        for key, (chunk_enemies, chunk_spears) in state.items():
+            chunk = self._chunk(key)
+            chunk.enemies.extend(chunk_enemies)
+            chunk.spears.extend(chunk_spears)
+            if chunk.is_active:
+                self._spawn(chunk, enemies, spears)
+
+    def _deactivate(self, chunk):
+        chunk.is_active = False
+        self.active.discard(chunk.key)
+
+        self.platforms.remove(chunk.sprites)
+        changed = bool(chunk.sprites)
+        chunk.sprites = []
+        if not chunk.platforms and not chunk.enemies and not chunk.spears:
+            del self.chunks[chunk.key]  # Пустой чанк создастся заново, если понадобится
+        return changed
+
+    def _store_inactive(self, enemies, spears):
+        """Записывает врагов и копья из неактивных чанков в их массивы и убивает спрайты"""
+        for enemy in enemies.sprites():
+            if self._key(*enemy.rect.topleft) in self.active:
+                continue
+            last_action = -1 if enemy.last_action is None else enemy.last_action
+            facing = -1 if enemy._facing == 'left' else 1
+            record = (*enemy.rect.topleft, *enemy.velocity, enemy.health, last_action, facing)
+            self._chunk_at(*enemy.rect.topleft).enemies.extend(record)
+            enemy.kill()  # Возвращается в пул
+
+        for spear in spears.sprites():
+            if self._key(*spear.rect.topleft) in self.active:
+                continue
+            owner = spear.owner is not None and spear.owner is self.player
+            record = (*spear.rect.topleft, *spear.velocity, spear.angle, spear.is_stuck, owner)
+            self._chunk_at(*spear.rect.topleft).spears.extend(record)
+            spear.kill()
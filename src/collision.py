@@ -0,0 +1,361 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+import pygame
+
+# Категории столкновений (биты маски)
+PLAYER = 1 << 0
+ENEMY = 1 << 1
+PROJECTILE = 1 << 2
+STATIC = 1 << 3
+
+ALL = PLAYER | ENEMY | PROJECTILE | STATIC
+
+# Результат луча: точка попадания, расстояние до нее, нормаль грани и коллайдер
+RayHit = namedtuple('RayHit', 'point distance normal collider')
+
+
+class CollisionWorld:
+    """
+    Широкая фаза столкновений.
+
+    Объекты раскладываются по корзинам своих категорий. Запрос тела смотрит только
+    в корзины из его маски collides_with, а проверка прямоугольников делается одним
+    вызовом Rect.collidelistall на корзину. Пары тело-владелец (например, копье и
+    бросивший его игрок) отбрасываются здесь же, до любых Python-колбэков.
+
+    Неподвижная геометрия уровня задается отдельно через set_static и не
+    перекладывается каждый шаг.
+
+    Для лучей и прямой видимости неподвижные коллайдеры дополнительно разложены
+    по равномерной сетке: луч обходит только ячейки на своем пути (DDA).
+
+    Каждый объект должен иметь атрибуты rect, category и owner.
+    """
+
+    def __init__(self, cell_size=64):
+        self._buckets = {}  # категория -> (объекты, их прямоугольники)
+        self._static = ([], [])
+
+        self.cell_size = cell_size
+        self._grid = {}  # (cx, cy) -> индексы неподвижных коллайдеров
+        self._grid_bounds = None  # (cx0, cy0, cx1, cy1) включительно
+        self._static_bounds = np.zeros((0, 4))  # left, top, right, bottom
+
+    def set_static(self, colliders):
+        """Задает неподвижные коллайдеры уровня (обычно результат build_static_colliders)"""
+        objects, rects = self._static
+        objects.clear()
+        rects.clear()
+        for collider in colliders:
+            objects.append(collider)
+            rects.append(collider.rect)
+
+        self._grid.clear()
+        self._grid_bounds = None
+        self._static_bounds = np.array(
+            [(rect.left, rect.top, rect.right, rect.bottom) for rect in rects], dtype=float
+        ).reshape(-1, 4)
+
+        size = self.cell_size
+        for i, rect in enumerate(rects):
+            cx0, cy0 = math.floor(rect.left / size), math.floor(rect.top / size)
+            cx1, cy1 = math.floor(rect.right / size), math.floor(rect.bottom / size)
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self._grid.setdefault((cx, cy), []).append(i)
+
+        if self._grid:
+            cells = np.array(list(self._grid))
+            self._grid_bounds = (*cells.min(axis=0).tolist(), *cells.max(axis=0).tolist())
+
+    def rebuild(self, sprites):
+        """Перераскладывает объекты по корзинам (вызывается раз за шаг симуляции)"""
+        for objects, rects in self._buckets.values():
+            objects.clear()
+            rects.clear()
+
+        for sprite in sprites:
+            bucket = self._buckets.get(sprite.category)
+            if bucket is None:
+                bucket = self._buckets[sprite.category] = ([], [])
+            bucket[0].append(sprite)
+            bucket[1].append(sprite.rect)
+
+    def query(self, body, rect=None):
+        """
+        Возвращает объекты, с которыми тело может столкнуться
+
+        Args:
+            body: тело с rect, collides_with и owner
+            rect: область поиска (по умолчанию body.rect)
+
+        Returns:
+            list: пересекающиеся с областью объекты подходящих категорий
+        """
+        if rect is None:
+            rect = body.rect
+
+        hits = []
+        if body.collides_with & STATIC:
+            objects, rects = self._static
+            hits.extend(objects[i] for i in rect.collidelistall(rects))
+
+        for category, (objects, rects) in self._buckets.items():
+            if not body.collides_with & category:
+                continue
+
+            for i in rect.collidelistall(rects):
+                other = objects[i]
+                if other is body or other is body.owner or other.owner is body:
+                    continue
+                hits.append(other)
+
+        return hits
+
+    def raycast(self, origin, direction, max_distance=math.inf):
+        """
+        Первое попадание луча в неподвижную геометрию
+
+        Луч проходит по ячейкам сетки по порядку (Amanatides-Woo DDA), и проверяются
+        только коллайдеры встреченных ячеек; обход заканчивается, как только
+        найденное попадание оказывается ближе следующей ячейки.
+
+        Args:
+            origin: начало луча (x, y)
+            direction: направление (длина не важна)
+            max_distance: длина луча
+
+        Returns:
+            RayHit | None
+        """
+        ox, oy = origin
+        dx, dy = direction
+        length = math.hypot(dx, dy)
+        if not length or self._grid_bounds is None:
+            return None
+        dx /= length
+        dy /= length
+
+        # Обрезаем луч по границам сетки
+        size = self.cell_size
+        gx0, gy0, gx1, gy1 = self._grid_bounds
+        clipped = _slab(ox, oy, dx, dy, gx0 * size, gy0 * size, (gx1 + 1) * size, (gy1 + 1) * size)
+        if clipped is None:
+            return None
+        t, t_end = max(clipped[0], 0.0), min(clipped[1], max_distance)
+        if t > t_end:
+            return None
+
+        cx = math.floor((ox + dx * t) / size)
+        cy = math.floor((oy + dy * t) / size)
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        delta_x = size / abs(dx) if dx else math.inf
+        delta_y = size / abs(dy) if dy else math.inf
+        next_x = ((cx + (dx > 0)) * size - ox) / dx if dx else math.inf
+        next_y = ((cy + (dy > 0)) * size - oy) / dy if dy else math.inf
+
+        objects, rects = self._static
+        tested = set()
+        best = None
+        while t <= t_end:
+            for i in self._grid.get((cx, cy), ()):
+                if i in tested:
+                    continue
+                tested.add(i)
+                rect = rects[i]
+                hit = _slab(ox, oy, dx, dy, rect.left, rect.top, rect.right, rect.bottom)
+                if hit is None or hit[1] < 0 or hit[0] > t_end:
+                    continue
+                if best is None or max(hit[0], 0.0) < best[0]:
+                    best = (max(hit[0], 0.0), hit[2], i)
+
+            # Попадание внутри текущей ячейки ближе любой следующей
+            if best is not None and best[0] <= min(next_x, next_y):
+                break
+            if next_x < next_y:
+                t = next_x
+                next_x += delta_x
+                cx += step_x
+            else:
+                t = next_y
+                next_y += delta_y
+                cy += step_y
+
+        if best is None:
+            return None
+        distance, axis, i = best
+        if distance == 0:
+            normal = (0, 0)  # Луч начался внутри коллайдера
+        elif axis == 'x':
+            normal = (-step_x, 0)
+        else:
+            normal = (0, -step_y)
+        point = (ox + dx * distance, oy + dy * distance)
+        return RayHit(point, distance, normal, objects[i])
+
+    def segment_cast(self, start, end):
+        """Первое попадание на отрезке от start до end (RayHit или None)"""
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        return self.raycast(start, (dx, dy), math.hypot(dx, dy))
+
+    def line_of_sight(self, start, end):
+        """Нет ли неподвижной геометрии между двумя точками"""
+        return self.segment_cast(start, end) is None
+
+    def line_of_sight_batch(self, segments, chunk_size=1024):
+        """
+        Прямая видимость сразу для многих отрезков
+
+        Отрезки проверяются против всех неподвижных коллайдеров векторным slab-тестом:
+        коллайдеров после объединения немного, и один проход NumPy по матрице
+        (отрезки x коллайдеры) дешевле, чем обход сетки для каждого отрезка в Python.
+
+        Args:
+            segments: массив (N, 4) - x0, y0, x1, y1
+            chunk_size: сколько отрезков проверять за раз (ограничивает память)
+
+        Returns:
+            np.ndarray: bool (N,), True - отрезок ничем не перекрыт
+        """
+        segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+        visible = np.ones(len(segments), dtype=bool)
+        if not len(self._static_bounds):
+            return visible
+
+        lefts, tops, rights, bottoms = self._static_bounds.T
+        for start in range(0, len(segments), chunk_size):
+            x0, y0, x1, y1 = (column[:, None] for column in segments[start : start + chunk_size].T)
+            x_enter, x_exit = _slab_axis(x0, x1 - x0, lefts, rights)
+            y_enter, y_exit = _slab_axis(y0, y1 - y0, tops, bottoms)
+            enter = np.maximum(np.maximum(x_enter, y_enter), 0)
+            exit_ = np.minimum(np.minimum(x_exit, y_exit), 1)
+            visible[start : start + chunk_size] = ~(enter <= exit_).any(axis=1)
+
+        return visible
+
+
+def _slab(ox, oy, dx, dy, left, top, right, bottom):
+    """
+    Пересечение луча с прямоугольником
+
+    Returns:
+        tuple | None: (t входа, t выхода, ось входа 'x' или 'y') или None, если промах
+    """
+    t_enter, t_exit, axis = -math.inf, math.inf, None
+    for o, d, lo, hi, name in ((ox, dx, left, right, 'x'), (oy, dy, top, bottom, 'y')):
+        if d:
+            t0, t1 = (lo - o) / d, (hi - o) / d
+            if t0 > t1:
+                t0, t1 = t1, t0
+            if t0 > t_enter:
+                t_enter, axis = t0, name
+            t_exit = min(t_exit, t1)
+        elif not lo <= o <= hi:
+            return None
+    if t_enter > t_exit:
+        return None
+    return t_enter, t_exit, axis
+
+
+def _slab_axis(origin, delta, lo, hi):
+    """Векторный slab-тест по одной оси: параметры входа и выхода отрезков (N, M)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t0 = (lo - origin) / delta
+        t1 = (hi - origin) / delta
+    enter = np.minimum(t0, t1)
+    exit_ = np.maximum(t0, t1)
+
+    # Отрезок параллелен оси: либо целиком внутри полосы, либо мимо
+    parallel = delta == 0
+    if parallel.any():
+        inside = (lo <= origin) & (origin <= hi)
+        enter = np.where(parallel, np.where(inside, -np.inf, np.inf), enter)
+        exit_ = np.where(parallel, np.where(inside, np.inf, -np.inf), exit_)
+    return enter, exit_
+
+
+class StaticCollider(pygame.sprite.Sprite):
+    """
+    Неподвижный прямоугольник столкновений.
+
+    Это спрайт без изображения: пока коллайдер жив (состоит в группе уровня),
+    тела могут на нем спать; пересборка уровня убивает старые коллайдеры и тем
+    самым будит тех, кто на них опирался.
+    """
+
+    category = STATIC
+    owner = None
+    is_sleeping = False
+
+    def __init__(self, rect, *groups):
+        super().__init__(*groups)
+        self.rect = pygame.FRect(rect)
+
+
+def merge_rects(rects):
+    """
+    Объединяет касающиеся и пересекающиеся прямоугольники в небольшой набор
+    непересекающихся прямоугольников, покрывающих ту же площадь
+
+    Координаты сжимаются до сетки из границ прямоугольников, занятые ячейки
+    жадно собираются в максимально широкие полосы, а полосы - в прямоугольники
+    максимальной высоты.
+
+    Args:
+        rects: прямоугольники (Rect, FRect или кортежи x, y, w, h)
+
+    Returns:
+        list[pygame.FRect]: объединенные прямоугольники
+    """
+    rects = [pygame.FRect(rect) for rect in rects]
+    rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+    if not rects:
+        return []
+
+    xs = np.unique([edge for rect in rects for edge in (rect.left, rect.right)])
+    ys = np.unique([edge for rect in rects for edge in (rect.top, rect.bottom)])
+
+    occupied = np.zeros((len(ys) - 1, len(xs) - 1), dtype=bool)
+    for rect in rects:
+        i0, i1 = np.searchsorted(xs, (rect.left, rect.right))
+        j0, j1 = np.searchsorted(ys, (rect.top, rect.bottom))
+        occupied[j0:j1, i0:i1] = True
+
+    merged = []
+    for j, i in zip(*np.nonzero(occupied)):
+        if not occupied[j, i]:
+            continue  # Уже вошла в другой прямоугольник
+
+        # Растягиваем вправо, пока ячейки заняты
+        i1 = i + 1
+        while i1 < occupied.shape[1] and occupied[j, i1]:
+            i1 += 1
+
+        # Растягиваем вниз, пока вся полоса занята
+        j1 = j + 1
+        while j1 < occupied.shape[0] and occupied[j1, i:i1].all():
+            j1 += 1
+
+        occupied[j:j1, i:i1] = False
+        merged.append(pygame.FRect(xs[i], ys[j], xs[i1] - xs[i], ys[j1] - ys[j]))
+
+    return merged
+
+
+def build_static_colliders(platforms):
+    """
+    Шаг загрузки уровня: строит объединенные коллайдеры для платформ
+
+    Платформы остаются отдельными спрайтами для отрисовки, а столкновения
+    считаются по результату.
+
+    Returns:
+        pygame.sprite.Group: группа StaticCollider
+    """
+    group = pygame.sprite.Group()
+    for rect in merge_rects(platform.rect for platform in platforms):
+        StaticCollider(rect, group)
+    return group
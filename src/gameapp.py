@@ -1,45 +1,96 @@
 import random
+from functools import partial
+
 import pygame
 
+from .ai import AIScheduler, AIWorker, BatchedEnemyAI
 from .mainwindow import MainWindow
 
 from .camera import Camera
+from .chunks import ChunkManager
+from .collision import CollisionWorld, build_static_colliders
+from .journal import load_journaled
+from .level import DEFAULT_PATH
+from .lod import SimulationLOD
+from .navigation import NavigationGraph
+from .particles import ParticleSystem
+from .render import RENDERERS
 
 from .util import get_image
 from .windowevents import GameAppEventHandler, PlayerMotionEventHandler, StopHandling
-from .sprites import Platform, Player
+from .pool import EntityPool, RingGroup
+from .snapshot import WorldSnapshot
+from .sprites import Enemy, Player, Spear
 from .ui import Subwindow
 
 
 class GameApp:
-    def __init__(self):
+    def __init__(
+        self,
+        max_spears=5,
+        pool_size=32,
+        ai_brain=None,
+        ai_rate=10.0,
+        ai_thread=False,
+        level_path=DEFAULT_PATH,
+        renderer='surface',
+        resolution=None,
+    ):
         if not pygame.get_init():
             raise RuntimeError('pygame is not initialised')
 
-        pygame.display.set_mode(
-            (400, 400),
-            pygame.RESIZABLE | pygame.DOUBLEBUF | pygame.HWSURFACE | pygame.HWACCEL,
-            vsync=1,
+        # Мир рисуется выбранным способом: blit на поверхность окна или текстурами SDL.
+        # С resolution - в постоянном разрешении, растянутом на окно
+        self._renderer = RENDERERS[renderer](
+            (400, 400), 'Vnezapni Gamejam Game', resolution=resolution
         )
-        pygame.display.set_caption('Vnezapni Gamejam Game')
-
-        self._screen = pygame.display.get_surface()
+        self._screen = self._renderer.overlay
         self._is_running = True
         self._dt = 0
         self.is_paused = False
 
+        # Копья и враги переиспользуются, а не создаются заново на каждое нажатие
+        self.max_spears = max_spears
+        self.level_path = level_path
+        # Эффекты попаданий и смертей: частицы в массивах, а не спрайты. Система
+        # передается каждому телу этого приложения (пулы создают тела уже с ней)
+        self._particles = ParticleSystem()
+        self._spear_pool = EntityPool(partial(Spear, effects=self._particles), pool_size)
+        self._enemy_pool = EntityPool(partial(Enemy, effects=self._particles), pool_size)
+        self._world = CollisionWorld()
+        # Дальние от камеры тела обновляются реже или замораживаются
+        self._lod = SimulationLOD()
+
+        # Граф поверхностей для поиска пути врагами; обновляется при сборке коллайдеров
+        self._navigation = NavigationGraph()
+        # Если задана нейросеть, врагами управляет ИИ: решения пачками с частотой ai_rate
+        # или (ai_thread) в отдельном потоке по снимку прошлого тика
+        self._ai = None
+        self._ai_worker = None
+        if ai_brain is not None and ai_thread:
+            self._ai_worker = AIWorker(BatchedEnemyAI(ai_brain, navigation=self._navigation))
+        elif ai_brain is not None:
+            self._ai = AIScheduler(BatchedEnemyAI(ai_brain, navigation=self._navigation), ai_rate)
+
         self.reload()
 
     def reload(self):
-        self._player = Player(200, 100)
-        self._spears = pygame.sprite.Group()
-        self._platforms = pygame.sprite.Group(
-            Platform(100, 100, 10, 0),
-            Platform(61, 40, 0, 3),
-        )
+        self._player = Player(200, 100, self._particles)
+        self._spears = RingGroup(self.max_spears)
         self._enemies = pygame.sprite.Group()
+        self._camera = Camera(*self._renderer.view_size, self._player)
 
-        self._camera = Camera(400, 400, self._player)
+        # Уровень перечитывается при каждой перезагрузке (Shift+F6) вместе с журналом,
+        # чтобы подхватить правки открытого редактора. Живут только платформы, враги
+        # и копья чанков рядом с камерой
+        self._chunks = ChunkManager(
+            load_journaled(self.level_path), self._spear_pool, self._enemy_pool, self._player
+        )
+        self._platforms = self._chunks.platforms
+        self._chunks.update(self._camera.camera_rect, self._enemies, self._spears)
+
+        self._colliders = pygame.sprite.Group()
+        self.rebuild_static()
         self._was_game_over = False
 
         self._ui = MainWindow(self, self._screen)
@@ -48,9 +99,15 @@ class GameApp:
         self._event_handlers = (
             self._ui,
             GameAppEventHandler(self, self._camera),
-            PlayerMotionEventHandler(self._player, self._spears, self._enemies),
+            PlayerMotionEventHandler(
+                self._player, self._spears, self._enemies, self._spear_pool, self._enemy_pool
+            ),
         )
 
+        # Начальное состояние уровня: перезапуск (F6) просто восстанавливает его
+        self._start_snapshot = self.capture()
+        self._quick_snapshot = None
+
     def run(self):
         clock = pygame.time.Clock()
 
@@ -70,26 +127,20 @@ class GameApp:
             if not self.is_paused:
                 self.update()
             self._camera.update()
-            if len(self._spears) > 5:
-                sorted_spears = sorted(self._spears, key=lambda s: s.creation_time)
-                sorted_spears[0].kill()
+            if self._chunks.update(self._camera.camera_rect, self._enemies, self._spears):
+                self.rebuild_static()
 
             if self._player.rect.y > 1000 and not self._was_game_over:
                 self._ui.show_game_over()
                 self._was_game_over = True
 
-            self._screen.fill("#C8FFFD")
-            # self._platforms.draw(self._screen)
-            # self._screen.blit(self._player.image, self._player.rect)
-
-            for sprite in (
-                self._player,
-                *self._enemies,
-                *self._spears,
-                *self._platforms,
-            ):
-                screen_pos = self._camera.apply(sprite)
-                self._screen.blit(sprite.image, screen_pos)
+            self._renderer.begin("#C8FFFD")
+            self._renderer.draw_sprites(
+                (self._player, *self._enemies, *self._spears, *self._platforms),
+                self._camera,
+            )
+            self._renderer.draw_particles(self._particles, self._camera)
+            self._renderer.end_world()
 
             self._ui.draw(self._screen)
 
@@ -100,11 +151,73 @@ class GameApp:
 
             # self._screen.blit(font.render(f'FPS: {clock.get_fps()}', True, '#00ff00'), (10, 10))
 
-            pygame.display.flip()
+            self._renderer.present()
+
+        if self._ai_worker is not None:
+            self._ai_worker.close()
 
     def stop(self):
         self._is_running = False
 
+    def resize(self, w, h):
+        self._renderer.resize((w, h))
+        # В постоянном разрешении камера видит столько же мира при любом окне
+        self._camera.resize(*self._renderer.view_size)
+        self._screen = self._renderer.overlay
+        self._ui.set_screen(self._screen)
+
+    def capture(self):
+        """Снимок динамического состояния мира"""
+        return WorldSnapshot.capture(
+            self._player, self._enemies, self._spears, self._camera, self._chunks
+        )
+
+    def restore(self, snapshot):
+        """Восстанавливает мир из снимка без пересоздания уровня и интерфейса"""
+        snapshot.restore(
+            self._player,
+            self._enemies,
+            self._spears,
+            self._camera,
+            self._spear_pool,
+            self._enemy_pool,
+            self._chunks,
+        )
+        self._was_game_over = False
+        self._particles.clear()
+        self._ui.close_subwindows()
+        if self._chunks.update(self._camera.camera_rect, self._enemies, self._spears):
+            self.rebuild_static()
+
+    def restart(self):
+        """Мгновенный перезапуск уровня"""
+        self.restore(self._start_snapshot)
+
+    def quick_save(self):
+        self._quick_snapshot = self.capture()
+
+    def quick_load(self):
+        if self._quick_snapshot is not None:
+            self.restore(self._quick_snapshot)
+
+    def rebuild_static(self):
+        """Пересобирает коллайдеры и граф навигации по платформам активных чанков"""
+        # Столкновения считаются по объединенной геометрии, а не по каждой платформе.
+        # Старые коллайдеры убиваем, чтобы спавшие на них тела проснулись
+        self._colliders.empty()
+        self._colliders = build_static_colliders(self._platforms)
+        self._world.set_static(self._colliders)
+        self._navigation.update(self._colliders)
+
     def update(self):
-        group = pygame.sprite.Group(self._player, self._enemies, self._platforms, self._spears)
-        group.update(self._dt, group)
+        if self._ai is not None:
+            self._ai.update(self._dt, self._enemies.sprites(), self._player)
+        elif self._ai_worker is not None:
+            self._ai_worker.update(self._enemies.sprites(), self._player)
+
+        bodies = [*self._enemies, *self._spears]
+        self._world.rebuild([self._player, *bodies])
+        # Игрок шагает каждый тик, остальные - по уровню детализации от видимой области
+        self._player.update(self._dt, self._world)
+        self._lod.update(self._dt, self._world, bodies, self._camera.camera_rect)
+        self._particles.update(self._dt)
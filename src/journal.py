@@ -0,0 +1,206 @@
+import json
+import os
+import queue
+import threading
+import zlib
+from pathlib import Path
+
+from .level import DEFAULT_LEVEL, load_level, save_level, validate_platform
+
+JOURNAL_SUFFIX = '.journal'
+
+
+def _checksum(data):
+    return zlib.crc32(data)
+
+
+class EditJournal:
+    def __init__(self, level_path, compact_every=256):
+        """
+        Журнал правок уровня: только дописывание, запись в фоновом потоке
+
+        Каждая правка (добавление, изменение, удаление платформы) - одна строка JSON
+        в файле рядом с уровнем. Строки пишет отдельный поток, сразу сбрасывая их
+        на диск, так что главный цикл не ждет ввода-вывода, а при падении теряется
+        не больше последней несброшенной правки. Раз в compact_every правок журнал
+        сворачивается: уровень сохраняется целиком, а журнал начинается заново.
+
+        Первая строка журнала - контрольная сумма снимка уровня, поверх которого
+        записаны правки. Если программа упала между сохранением снимка и сбросом
+        журнала, сумма не совпадет и устаревший журнал будет пропущен.
+
+        Args:
+            level_path: файл уровня (снимок)
+            compact_every: через сколько правок сворачивать журнал
+        """
+        self.level_path = Path(level_path)
+        self.path = self.level_path.with_name(self.level_path.name + JOURNAL_SUFFIX)
+        self.compact_every = compact_every
+        self.platforms = []
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._file = None
+        self._since_compaction = 0
+
+    def open(self, fallback=DEFAULT_LEVEL):
+        """
+        Восстанавливает уровень (снимок и хвост журнала) и запускает поток записи
+
+        Args:
+            fallback: уровень, если снимка еще нет (например, импортированный edmem)
+
+        Returns:
+            list[tuple]: платформы уровня; этот же список меняют методы журнала
+        """
+        data, replayed = self._load(fallback)
+        if data is None or replayed:
+            # Свернутое состояние сразу в снимок: следующий запуск не переигрывает журнал
+            data = save_level(self.level_path, self.platforms)
+        # Журнал всегда начинается заново: дописывать в чужой (сумма не совпала)
+        # или оборванный журнал нельзя - новые правки легли бы после мусора
+        self._reset_journal(_checksum(data))
+
+        self._thread = threading.Thread(target=self._run, name='edit-journal', daemon=True)
+        self._thread.start()
+        return self.platforms
+
+    def read(self, fallback=DEFAULT_LEVEL):
+        """
+        Читает уровень (снимок и хвост журнала), ничего не записывая
+
+        Так уровень читает игра, пока редактор открыт: его правки лежат в журнале
+        до свертки. Если редактор свернул журнал во время чтения, уровень
+        перечитывается по новому снимку.
+
+        Returns:
+            list[tuple]: платформы уровня
+        """
+        while True:
+            data, _ = self._load(fallback)
+            if data is None or self.level_path.read_bytes() == data:
+                return self.platforms
+
+    def _load(self, fallback):
+        """Снимок и правки журнала в self.platforms; возвращает (снимок или None, число правок)"""
+        if not self.level_path.exists():
+            self.platforms[:] = fallback
+            return None, 0
+        data = self.level_path.read_bytes()
+        self.platforms[:] = load_level(self.level_path)
+        return data, self._replay(_checksum(data))
+
+    def _replay(self, checksum):
+        """Применяет правки журнала к снимку (до первой испорченной строки); возвращает их число"""
+        if not self.path.exists():
+            return 0
+
+        count = 0
+        # Испорченные байты не должны ронять чтение: такая строка просто не разберется
+        with open(self.path, encoding='utf-8', errors='replace') as f:
+            try:
+                header = json.loads(f.readline())
+            except json.JSONDecodeError:
+                return 0
+            if not isinstance(header, dict) or header.get('base') != checksum:
+                return 0  # Журнал уже свернут в снимок
+
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, KeyError, IndexError, TypeError, ValueError):
+                    break  # Оборванная последняя строка после падения
+                count += 1
+        return count
+
+    def _apply(self, entry):
+        op = entry['op']
+        if op == 'add':
+            self.platforms.append(validate_platform(entry['platform']))
+        elif op == 'set':
+            self.platforms[entry['index']] = validate_platform(entry['platform'])
+        elif op == 'del':
+            del self.platforms[entry['index']]
+        else:
+            raise ValueError(f'unknown journal operation {op!r}')
+
+    def _reset_journal(self, checksum):
+        """Атомарно заменяет журнал пустым поверх снимка с суммой checksum"""
+        if self._file is not None:
+            self._file.close()
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'base': checksum}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def add(self, args):
+        """Добавляет платформу"""
+        args = validate_platform(args)
+        self.platforms.append(args)
+        self._record({'op': 'add', 'platform': args})
+
+    def set(self, index, args):
+        """Заменяет платформу с номером index"""
+        args = validate_platform(args)
+        self.platforms[index] = args
+        self._record({'op': 'set', 'index': index, 'platform': args})
+
+    def delete(self, index):
+        """Удаляет платформу с номером index"""
+        del self.platforms[index]
+        self._record({'op': 'del', 'index': index})
+
+    def _record(self, entry):
+        self._queue.put(json.dumps(entry) + '\n')
+        self._since_compaction += 1
+        if self._since_compaction >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Ставит в очередь свертку журнала в снимок текущего уровня"""
+        self._since_compaction = 0
+        self._queue.put(list(self.platforms))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            # Все, что накопилось в очереди, пишем одной пачкой и одним fsync
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, str):
+                    self._file.write(item)
+                else:
+                    self._file.flush()
+                    self._reset_journal(_checksum(save_level(self.level_path, item)))
+
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Сворачивает журнал и останавливает поток"""
+        if self._thread is None:
+            return
+        self.compact()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        self._file = None
+
+
+def load_journaled(path):
+    """Уровень с несвернутыми правками редактора или DEFAULT_LEVEL, если файла нет"""
+    if path is None:
+        return list(DEFAULT_LEVEL)
+    return EditJournal(path).read()
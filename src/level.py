@@ -0,0 +1,173 @@
+import ast
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+# Уровень - список аргументов Platform: (x, y, tile_w, tile_h)
+DEFAULT_LEVEL = ((100, 100, 10, 0), (61, 40, 0, 3))
+DEFAULT_PATH = 'level.json'
+LEGACY_PATH = 'edmem'  # Старый файл редактора: repr списка платформ
+
+FORMAT = 'throwjam-level'
+VERSION = 1
+
+# Двоичный вариант: заголовок, затем колонки x, y (double) и tile_w, tile_h (int32)
+MAGIC = b'TJLV'
+_HEADER = struct.Struct('<4sHI')  # MAGIC, версия, число платформ
+BINARY_SUFFIXES = ('.tjl', '.bin')
+
+MAX_TILES = 10_000  # Больше тайлов в одной платформе - явно испорченный файл
+
+
+def validate_platform(args):
+    """
+    Проверяет аргументы одной платформы
+
+    Returns:
+        tuple: (x, y, tile_w, tile_h)
+
+    Raises:
+        ValueError: если аргументы не подходят для Platform
+    """
+    if not isinstance(args, (tuple, list)) or len(args) != 4:
+        raise ValueError(f'platform must be (x, y, tile_w, tile_h), not {args!r}')
+
+    x, y, tile_w, tile_h = args
+    for value in (x, y):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f'platform coordinates must be finite numbers: {args!r}')
+    for value in (tile_w, tile_h):
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MAX_TILES:
+            raise ValueError(f'platform tile counts must be integers in [0, {MAX_TILES}]: {args!r}')
+    return (x, y, tile_w, tile_h)
+
+
+def parse_platform(text):
+    """Разбирает строку вида '(x, y, tile_w, tile_h)' без eval"""
+    try:
+        args = ast.literal_eval(text)
+    except (SyntaxError, ValueError) as e:
+        raise ValueError(f'cannot parse platform {text!r}') from e
+    return validate_platform(args)
+
+
+def validate_level(platforms):
+    """Проверяет все платформы уровня; возвращает список кортежей"""
+    if not isinstance(platforms, (tuple, list)):
+        raise ValueError('level must be a list of platforms')
+    return [validate_platform(args) for args in platforms]
+
+
+def load_level(path):
+    """
+    Загружает уровень в любом поддерживаемом формате
+
+    Формат определяется по содержимому: двоичный (MAGIC в начале), JSON
+    или старый файл редактора edmem (разбирается ast.literal_eval, не eval).
+
+    Returns:
+        list[tuple]: аргументы Platform
+
+    Raises:
+        ValueError: если файл испорчен или версия не поддерживается
+    """
+    data = Path(path).read_bytes()
+    if data.startswith(MAGIC):
+        return _load_binary(path, data)
+
+    text = data.decode()
+    if text.lstrip().startswith('{'):
+        try:
+            document = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'{path}: invalid level file: {e}') from e
+        if document.get('format') != FORMAT:
+            raise ValueError(f'{path} is not a level file')
+        if document.get('version') != VERSION:
+            raise ValueError(f'{path}: unsupported level version {document.get("version")}')
+        return validate_level(document.get('platforms', []))
+
+    try:
+        platforms = ast.literal_eval(text)
+    except (SyntaxError, ValueError) as e:
+        raise ValueError(f'{path}: invalid legacy level file') from e
+    return validate_level(platforms)
+
+
+def _load_binary(path, data):
+    if len(data) < _HEADER.size:
+        raise ValueError(f'{path}: truncated level file')
+    _, version, count = _HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f'{path}: unsupported level version {version}')
+
+    columns = (array('d'), array('d'), array('i'), array('i'))
+    offset = _HEADER.size
+    for column in columns:
+        size = count * column.itemsize
+        if offset + size > len(data):
+            raise ValueError(f'{path}: truncated level file')
+        column.frombytes(data[offset : offset + size])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        offset += size
+
+    xs, ys, tile_ws, tile_hs = columns
+    if not all(map(math.isfinite, xs)) or not all(map(math.isfinite, ys)):
+        raise ValueError(f'{path}: platform coordinates must be finite numbers')
+    if min(tile_ws, default=0) < 0 or min(tile_hs, default=0) < 0:
+        raise ValueError(f'{path}: platform tile counts must be non-negative')
+    if max(tile_ws, default=0) > MAX_TILES or max(tile_hs, default=0) > MAX_TILES:
+        raise ValueError(f'{path}: platform tile counts must not exceed {MAX_TILES}')
+
+    # Целые координаты (как у платформ из редактора) возвращаем целыми
+    return [
+        (int(x) if x.is_integer() else x, int(y) if y.is_integer() else y, tile_w, tile_h)
+        for x, y, tile_w, tile_h in zip(xs, ys, tile_ws, tile_hs)
+    ]
+
+
+def save_level(path, platforms):
+    """
+    Сохраняет уровень: двоичный формат для суффиксов .tjl и .bin, иначе JSON
+
+    Файл пишется во временный и атомарно подменяет старый.
+
+    Returns:
+        bytes: записанное содержимое файла
+    """
+    path = Path(path)
+    platforms = validate_level(platforms)
+
+    if path.suffix in BINARY_SUFFIXES:
+        columns = (
+            array('d', (args[0] for args in platforms)),
+            array('d', (args[1] for args in platforms)),
+            array('i', (args[2] for args in platforms)),
+            array('i', (args[3] for args in platforms)),
+        )
+        if sys.byteorder == 'big':
+            for column in columns:
+                column.byteswap()
+        data = _HEADER.pack(MAGIC, VERSION, len(platforms)) + b''.join(
+            column.tobytes() for column in columns
+        )
+    else:
+        document = {'format': FORMAT, 'version': VERSION, 'platforms': platforms}
+        data = json.dumps(document, separators=(',', ':')).encode()
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return data
+
+
+def load_or_default(path):
+    """Уровень из файла или DEFAULT_LEVEL, если файла нет"""
+    if path is None or not os.path.exists(path):
+        return list(DEFAULT_LEVEL)
+    return load_level(path)
@@ -0,0 +1,71 @@
+import math
+
+# Уровни детализации по умолчанию: (отступ от области камеры в px, шаг симуляции в тиках).
+# Тела дальше последнего отступа заморожены
+DEFAULT_TIERS = ((64, 1), (512, 4), (1536, 16))
+
+
+class SimulationLOD:
+    def __init__(self, tiers=DEFAULT_TIERS, max_dt=0.1):
+        """
+        Уровни детализации симуляции по расстоянию от камеры
+
+        Тела в пределах первого отступа от области камеры обновляются каждый тик,
+        дальние - раз в N тиков с шагом, равным накопленному за это время dt,
+        а тела дальше последнего отступа заморожены (время для них не идет).
+        Обновления дальних тел разнесены по тикам, чтобы не приходиться на один кадр.
+
+        Args:
+            tiers: пары (отступ, интервал) по возрастанию отступа
+            max_dt: наибольший шаг симуляции; накопленное время делится на шаги не длиннее
+                (чтобы редко обновляемое тело не проскакивало сквозь стены)
+        """
+        self.tiers = tuple(sorted(tiers))
+        self.max_dt = max_dt
+        self._tick = 0
+
+    def interval(self, rect, view):
+        """Через сколько тиков обновлять тело с прямоугольником rect (0 - заморожено)"""
+        dx = max(view.left - rect.right, rect.left - view.right, 0)
+        dy = max(view.top - rect.bottom, rect.top - view.bottom, 0)
+        distance = max(dx, dy)
+        for margin, interval in self.tiers:
+            if distance <= margin:
+                return interval
+        return 0
+
+    def update(self, dt, world, bodies, view):
+        """
+        Шаг симуляции для тел, которым он положен в этом тике
+
+        Args:
+            dt: длительность тика
+            world: CollisionWorld (уже перестроенный для этого тика)
+            bodies: тела (Physical)
+            view: область камеры (Camera.camera_rect)
+
+        Returns:
+            int: сколько тел обновлено
+        """
+        self._tick += 1
+        updated = 0
+        for index, body in enumerate(bodies):
+            interval = self.interval(body.rect, view)
+            if not interval:
+                body.lod_elapsed = 0.0
+                continue
+
+            body.lod_elapsed += dt
+            # Фаза по номеру тела разносит обновления тел одного уровня по разным тикам
+            # (номер, а не id: при одинаковом вводе симуляция повторяется точно)
+            if (self._tick + index) % interval:
+                continue
+
+            # Длинный накопленный шаг делим на части не больше max_dt
+            steps = max(1, math.ceil(body.lod_elapsed / self.max_dt))
+            step = body.lod_elapsed / steps
+            body.lod_elapsed = 0.0
+            for _ in range(steps):
+                body.update(step, world)
+            updated += 1
+        return updated
@@ -34,8 +34,16 @@ class MainWindow(Container):
             ),
         ))
         self._app = app
+        self.set_screen(screen)
+
+    def set_screen(self, screen):
         self._screen = self.capture_surface = screen
 
+    def close_subwindows(self):
+        for child in list(self._children):
+            if isinstance(child, Subwindow):
+                child.parent = None
+
     def show_game_over(self):
         def close_cb(widget, old_pseudo):
             if widget.pseudo != 'hover' or old_pseudo != 'pressed':
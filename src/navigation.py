@@ -0,0 +1,311 @@
+import heapq
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# Верхняя грань платформы, на которой можно стоять
+Surface = namedtuple('Surface', 'left right y')
+# Переход с одной поверхности на другую: kind - 'walk', 'jump' или 'fall'
+Edge = namedtuple('Edge', 'target kind cost')
+# Куда идти дальше: точка на следующей поверхности и как туда попасть
+Waypoint = namedtuple('Waypoint', 'x y kind')
+
+JUMP_PENALTY = 40  # Прыжок рискованнее ходьбы - доплачиваем за него в стоимости пути
+
+
+class JumpProfile:
+    def __init__(
+        self,
+        jump_force=-400,
+        move_speed=4000,
+        gravity=980,
+        max_speed=300,
+        dt=1 / 120,
+        max_drop=1000,
+        steps=8,
+    ):
+        """
+        Траектории прыжка и падения с разбега, посчитанные так же, как в Physical.update
+
+        Скорость интегрируется с ускорением move_speed и гравитацией и обрезается
+        по max_speed, поэтому дальность прыжка считается по той же физике, что и в игре.
+        Из-за этого ограничения разбег съедает высоту прыжка, так что траектории
+        считаются для нескольких долей разбега и берется лучшая на каждой высоте.
+
+        Args:
+            jump_force, move_speed: параметры тела (как у Player)
+            gravity: ускорение свободного падения, px/s**2
+            max_speed: ограничение модуля скорости, px/s
+            dt: шаг симуляции траектории
+            max_drop: до какой глубины под точкой старта считать траекторию
+            steps: на сколько долей разбега делить move_speed
+        """
+        self.jump = [
+            self._simulate(jump_force, move_speed * k / steps, gravity, max_speed, dt, max_drop)
+            for k in range(steps + 1)
+        ]
+        self.fall = [self._simulate(0, move_speed, gravity, max_speed, dt, max_drop)]
+        self.apex = -min(float(ys[0]) for _, ys in self.jump)  # Высота прыжка, px
+
+    @classmethod
+    def from_body(cls, body, **kwargs):
+        """Профиль по параметрам тела (обычно Player)"""
+        return cls(body.jump_force, body.move_speed, body.gravity.y, body.max_speed, **kwargs)
+
+    @staticmethod
+    def _simulate(vy, ax, gravity, max_speed, dt, max_drop):
+        xs, ys = [0.0], [0.0]
+        vx = x = y = 0.0
+        while y < max_drop:
+            vx += ax * dt
+            vy += gravity * dt
+            speed = math.hypot(vx, vy)
+            if speed > max_speed:
+                vx *= max_speed / speed
+                vy *= max_speed / speed
+            x += vx * dt
+            y += vy * dt
+            xs.append(x)
+            ys.append(y)
+
+        # Оставляем только нисходящую часть: на ней тело может приземлиться
+        top = int(np.argmin(ys))
+        return np.array(xs[top:]), np.array(ys[top:])
+
+    def reach(self, drop, jump=True):
+        """
+        Наибольшее расстояние по горизонтали до приземления на drop пикселей ниже старта
+
+        Меньшие расстояния тоже достижимы - тело может не разгоняться полностью.
+
+        Args:
+            drop: на сколько ниже точки старта поверхность (отрицательное - выше)
+            jump: с прыжком или просто сходя с края
+
+        Returns:
+            float | None: дальность или None, если высота недостижима
+        """
+        best = None
+        for xs, ys in self.jump if jump else self.fall:
+            if ys[0] <= drop <= ys[-1]:
+                reach = float(np.interp(drop, ys, xs))
+                best = reach if best is None else max(best, reach)
+        return best
+
+
+def exposed_surfaces(rects):
+    """
+    Верхние грани прямоугольников, не накрытые другими прямоугольниками
+
+    Args:
+        rects: непересекающиеся прямоугольники (обычно результат collision.merge_rects)
+
+    Returns:
+        list[Surface]
+    """
+    rects = list(rects)
+    surfaces = []
+    for rect in rects:
+        intervals = [(rect.left, rect.right)]
+        for other in rects:
+            if other is rect or not (other.top < rect.top <= other.bottom):
+                continue
+            # other накрывает часть грани: вырезаем ее из интервалов
+            cut = []
+            for left, right in intervals:
+                if other.right <= left or other.left >= right:
+                    cut.append((left, right))
+                    continue
+                if left < other.left:
+                    cut.append((left, other.left))
+                if other.right < right:
+                    cut.append((other.right, right))
+            intervals = cut
+        surfaces.extend(Surface(left, right, rect.top) for left, right in intervals)
+    return surfaces
+
+
+def _centre(surface):
+    return ((surface.left + surface.right) / 2, surface.y)
+
+
+def _distance(a, b):
+    (ax, ay), (bx, by) = _centre(a), _centre(b)
+    return math.hypot(bx - ax, by - ay)
+
+
+class NavigationGraph:
+    def __init__(self, profile=None):
+        """
+        Граф поверхностей платформ с переходами пешком, прыжком и падением
+
+        Граф строится при загрузке уровня по коллайдерам и обновляется
+        инкрементально: при правке уровня пересчитываются только ребра
+        появившихся поверхностей. Найденные A* пути кэшируются по паре
+        (поверхность старта, поверхность цели) до следующего изменения графа.
+
+        Args:
+            profile: JumpProfile тела, которое ходит по графу (по умолчанию как у Player)
+        """
+        self.profile = JumpProfile() if profile is None else profile
+        self.edges = {}  # Surface -> list[Edge]
+        self._paths = {}
+        self._lookup = None
+
+    def __len__(self):
+        return len(self.edges)
+
+    def update(self, colliders):
+        """
+        Приводит граф к текущим коллайдерам уровня
+
+        Returns:
+            tuple[int, int]: сколько поверхностей добавлено и удалено
+        """
+        surfaces = set(exposed_surfaces(collider.rect for collider in colliders))
+        removed = self.edges.keys() - surfaces
+        added = surfaces - self.edges.keys()
+        if not removed and not added:
+            return 0, 0
+
+        for surface in removed:
+            del self.edges[surface]
+        if removed:
+            for surface, edges in self.edges.items():
+                edges[:] = [edge for edge in edges if edge.target not in removed]
+
+        for surface in added:
+            self.edges[surface] = []
+        for surface in added:
+            for other in self.edges:
+                if other == surface:
+                    continue
+                self._link(surface, other)
+                if other not in added:
+                    self._link(other, surface)
+
+        self._paths.clear()
+        self._lookup = None
+        return len(added), len(removed)
+
+    def _link(self, a, b):
+        """Добавляет ребро a -> b, если с a можно попасть на b"""
+        gap = max(b.left - a.right, a.left - b.right, 0)
+        drop = b.y - a.y
+
+        if drop == 0 and gap == 0:
+            kind = 'walk'
+        else:
+            kind = None
+            if drop > 0:
+                reach = self.profile.reach(drop, jump=False)
+                if reach is not None and gap <= reach:
+                    kind = 'fall'
+            if kind is None:
+                reach = self.profile.reach(drop)
+                if reach is not None and gap <= reach:
+                    kind = 'jump'
+            if kind is None:
+                return
+
+        cost = _distance(a, b) + (JUMP_PENALTY if kind == 'jump' else 0)
+        self.edges[a].append(Edge(b, kind, cost))
+
+    def surface_at(self, x, y, tolerance=4):
+        """
+        Поверхность, на которой стоит (или над которой находится) точка
+
+        Args:
+            x, y: точка, обычно середина нижней грани тела (rect.midbottom)
+            tolerance: насколько точка может быть ниже поверхности
+
+        Returns:
+            Surface | None
+        """
+        if self._lookup is None:
+            surfaces = list(self.edges)
+            self._lookup = (
+                surfaces,
+                np.array([s.left for s in surfaces]),
+                np.array([s.right for s in surfaces]),
+                np.array([s.y for s in surfaces]),
+            )
+        surfaces, lefts, rights, tops = self._lookup
+        if not surfaces:
+            return None
+
+        below = np.where((lefts <= x) & (x <= rights) & (tops >= y - tolerance), tops, np.inf)
+        i = int(np.argmin(below))
+        return surfaces[i] if below[i] != np.inf else None
+
+    def path(self, start, goal):
+        """
+        Кратчайший путь A* между поверхностями (с кэшем)
+
+        Returns:
+            tuple[Edge, ...] | None: ребра пути (пустой кортеж, если start == goal)
+            или None, если цель недостижима
+        """
+        key = (start, goal)
+        if key in self._paths:
+            return self._paths[key]
+
+        path = self._search(start, goal)
+        self._paths[key] = path
+        return path
+
+    def _search(self, start, goal):
+        if start == goal:
+            return ()
+
+        counter = 0  # Разрешает равенство приоритетов без сравнения Surface
+        queue = [(_distance(start, goal), counter, start)]
+        costs = {start: 0.0}
+        came_from = {}
+
+        while queue:
+            _, _, surface = heapq.heappop(queue)
+            if surface == goal:
+                path = []
+                while surface != start:
+                    surface, edge = came_from[surface]
+                    path.append(edge)
+                return tuple(reversed(path))
+
+            for edge in self.edges[surface]:
+                cost = costs[surface] + edge.cost
+                if cost < costs.get(edge.target, math.inf):
+                    costs[edge.target] = cost
+                    came_from[edge.target] = (surface, edge)
+                    counter += 1
+                    heapq.heappush(queue, (cost + _distance(edge.target, goal), counter, edge.target))
+
+        return None
+
+    def next_waypoint(self, start, goal):
+        """
+        Следующая точка на пути от start к goal
+
+        Args:
+            start, goal: точки (x, y), обычно rect.midbottom врага и игрока
+
+        Returns:
+            Waypoint | None: точка на следующей поверхности пути (или сама цель на
+            той же поверхности) и способ попасть туда; None, если пути нет
+        """
+        start_surface = self.surface_at(*start)
+        goal_surface = self.surface_at(*goal)
+        if start_surface is None or goal_surface is None:
+            return None
+
+        path = self.path(start_surface, goal_surface)
+        if path is None:
+            return None
+        if not path:
+            return Waypoint(goal[0], goal_surface.y, 'walk')
+
+        edge = path[0]
+        target = edge.target
+        x = min(max(start[0], target.left), target.right)
+        return Waypoint(x, target.y, edge.kind)
@@ -0,0 +1,132 @@
+from itertools import repeat
+
+import numpy as np
+import pygame
+
+# Цвета частиц (индекс - поле colour)
+DUST = 0
+BLOOD = 1
+SPARK = 2
+PALETTE = ('#7a5c3a', '#c81e1e', '#fff3b0')
+
+
+class ParticleSystem:
+    def __init__(self, capacity=10_000, size=4, fade_steps=4, gravity=980, seed=None):
+        """
+        Частицы эффектов (пыль, кровь, искры) в заранее выделенных массивах NumPy
+
+        Частица - не спрайт, а строка в массивах положений, скоростей, оставшегося
+        времени жизни и цвета. Движение и удаление погасших частиц считаются
+        векторно для всех сразу; живые частицы всегда лежат в начале массивов.
+        Рисуются они пачками Surface.fblits из общих заготовок: по одной на цвет
+        и ступень затухания.
+
+        Args:
+            capacity: сколько частиц может жить одновременно (лишние не появляются)
+            size: размер частицы, px
+            fade_steps: число ступеней прозрачности при затухании
+            gravity: ускорение вниз, px/s**2
+            seed: зерно генератора случайных чисел
+        """
+        self.capacity = capacity
+        self.size = size
+        self.fade_steps = fade_steps
+        self.gravity = gravity
+        self.count = 0
+
+        self.positions = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetimes = np.zeros(capacity, dtype=np.float32)  # Осталось жить, с
+        self.durations = np.ones(capacity, dtype=np.float32)  # Полное время жизни, с
+        self.colours = np.zeros(capacity, dtype=np.uint8)
+
+        self._rng = np.random.default_rng(seed)
+        # Заготовки: sprites[colour * fade_steps + step], step 0 - самая бледная
+        self.sprites = []
+        for colour in PALETTE:
+            for step in range(fade_steps):
+                sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+                color = pygame.Color(colour)
+                color.a = 255 * (step + 1) // fade_steps
+                pygame.draw.circle(sprite, color, (size / 2, size / 2), size / 2)
+                self.sprites.append(sprite)
+
+    def emit(self, position, count, colour=DUST, speed=150, lifetime=0.5, direction=None, spread=180):
+        """
+        Выпускает count частиц из точки position
+
+        Args:
+            colour: индекс в PALETTE
+            speed: наибольшая начальная скорость, px/s
+            lifetime: наибольшее время жизни, с (каждая частица живет от половины до lifetime)
+            direction: направление выброса в градусах (как Vector2.as_polar) или None - вверх
+            spread: разброс направлений в обе стороны от direction, градусы
+        """
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+        new = slice(self.count, self.count + count)
+
+        angles = np.radians(
+            (-90 if direction is None else direction) + self._rng.uniform(-spread, spread, count)
+        )
+        speeds = self._rng.uniform(0.3, 1, count) * speed
+        self.positions[new] = position
+        self.velocities[new, 0] = np.cos(angles) * speeds
+        self.velocities[new, 1] = np.sin(angles) * speeds
+        self.lifetimes[new] = self._rng.uniform(0.5, 1, count) * lifetime
+        self.durations[new] = self.lifetimes[new]
+        self.colours[new] = colour
+        self.count += count
+
+    def update(self, dt):
+        """Двигает частицы и удаляет погасшие"""
+        if not self.count:
+            return
+        live = slice(0, self.count)
+        self.velocities[live, 1] += self.gravity * dt
+        self.positions[live] += self.velocities[live] * dt
+        self.lifetimes[live] -= dt
+
+        alive = self.lifetimes[live] > 0
+        if alive.all():
+            return
+        # Уплотняем: живые частицы переезжают в начало массивов
+        count = int(np.count_nonzero(alive))
+        for array in (self.positions, self.velocities, self.lifetimes, self.durations, self.colours):
+            array[:count] = array[live][alive]
+        self.count = count
+
+    def clear(self):
+        self.count = 0
+
+    def draw(self, surface, offset=(0, 0)):
+        """
+        Рисует частицы на surface пачками fblits
+
+        Args:
+            offset: левый верхний угол видимой области в координатах мира
+        """
+        if not self.count:
+            return
+        live = slice(0, self.count)
+        positions = self.positions[live] - np.asarray(offset, dtype=np.float32) - self.size / 2
+
+        # Невидимые частицы не рисуем
+        w, h = surface.get_size()
+        visible = (
+            (positions[:, 0] > -self.size)
+            & (positions[:, 0] < w)
+            & (positions[:, 1] > -self.size)
+            & (positions[:, 1] < h)
+        )
+        steps = np.ceil(self.lifetimes[live] / self.durations[live] * self.fade_steps) - 1
+        keys = self.colours[live].astype(np.intp) * self.fade_steps + np.clip(
+            steps, 0, self.fade_steps - 1
+        ).astype(np.intp)
+
+        keys = keys[visible]
+        positions = positions[visible]
+        for key in np.unique(keys):
+            dests = positions[keys == key].tolist()
+            surface.fblits(zip(repeat(self.sprites[key], len(dests)), dests))
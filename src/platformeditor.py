@@ -1,4 +1,5 @@
 import gc
+import os
 import random
 import sys
 import tracemalloc
@@ -7,12 +8,19 @@ import pygame
 from .mainwindow import MainWindow
 
 from .camera import Camera
+from .collision import CollisionWorld, build_static_colliders
+from .journal import EditJournal
+from .level import DEFAULT_LEVEL, DEFAULT_PATH, LEGACY_PATH, load_level, parse_platform
+from .navigation import NavigationGraph
 
 from .util import get_image
 from .windowevents import GameAppEventHandler, PlayerMotionEventHandler, StopHandling
-from .sprites import Platform, Player
+from .pool import EntityPool, RingGroup
+from .snapshot import WorldSnapshot
+from .sprites import Enemy, Platform, Player, Spear
 from .ui import Subwindow
 from tkinter import *
+from tkinter import messagebox
 
 
 class Input(Toplevel):
@@ -49,7 +57,7 @@ class Output(Toplevel):
 
 
 class GameApp:
-    def __init__(self):
+    def __init__(self, max_spears=5, pool_size=32, level_path=DEFAULT_PATH):
         if not pygame.get_init():
             raise RuntimeError('pygame is not initialised')
 
@@ -76,22 +84,29 @@ class GameApp:
         self._dt = 0
         self.is_paused = False
 
+        # Копья и враги переиспользуются, а не создаются заново на каждое нажатие
+        self.max_spears = max_spears
+        self._spear_pool = EntityPool(Spear, pool_size)
+        self._enemy_pool = EntityPool(Enemy, pool_size)
+        self._world = CollisionWorld()
+        self._colliders = pygame.sprite.Group()
+        self._navigation = NavigationGraph()
+
         self.reload()
-        try:
-            with open('edmem', 'r') as f:
-                self._plat_init_args = eval(f.read())
-        except (IOError, ValueError):
-            self._plat_init_args = [
-                (100, 100, 10, 0),
-                (61, 40, 0, 3),
-            ]
-            with open('edmem', 'w') as f:
-                f.write(repr(self._plat_init_args))
+        # Правки уровня пишутся в журнал; при запуске он доигрывается поверх снимка.
+        # Уровень из старого файла edmem переносится в новый формат
+        fallback = DEFAULT_LEVEL
+        if not os.path.exists(level_path) and os.path.exists(LEGACY_PATH):
+            fallback = load_level(LEGACY_PATH)
+        self._journal = EditJournal(level_path)
+        self._plat_init_args = self._journal.open(fallback)
         self._ip = None
+        self._platforms_dirty = True
+        self._quick_snapshot = None
 
     def reload(self):
         self._player = Player(200, 100)
-        self._spears = pygame.sprite.Group()
+        self._spears = RingGroup(self.max_spears)
         self._enemies = pygame.sprite.Group()
 
         self._camera = Camera(400, 400, self._player)
@@ -103,7 +118,9 @@ class GameApp:
         self._event_handlers = (
             self._ui,
             GameAppEventHandler(self, self._camera),
-            PlayerMotionEventHandler(self._player, self._spears, self._enemies),
+            PlayerMotionEventHandler(
+                self._player, self._spears, self._enemies, self._spear_pool, self._enemy_pool
+            ),
         )
 
     def run(self):
@@ -113,29 +130,28 @@ class GameApp:
             self._root.update()
             self._dt = clock.tick() / 1000
 
-            self._platforms = pygame.sprite.Group()
-            for args in self._plat_init_args:
-                # try:
-                p = Platform(*args)
-                # except pygame.error: # out of memory
-                #     ...
-                self._platforms.add(p)
+            if self._platforms_dirty:
+                self.rebuild_platforms()
 
             for event in pygame.event.get():
 
                 xy = self._camera.reverse_apply(pygame.mouse.get_pos())
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_1:
-                        self._plat_init_args.append((*xy, 0, 0))
-                        self.dump_edmem()
+                        self._journal.add((*xy, 0, 0))
+                        self._platforms_dirty = True
                     elif event.key == pygame.K_2:
                         for idx, target in enumerate(self._plat_init_args):
                             if Platform(*target).rect.collidepoint(xy):
 
                                 def cb(text):
-                                    self._plat_init_args[idx] = eval(text)
                                     self._ip = None
-                                    self.dump_edmem()
+                                    try:
+                                        self._journal.set(idx, parse_platform(text))
+                                    except ValueError as e:
+                                        messagebox.showerror('Invalid platform', str(e))
+                                        return
+                                    self._platforms_dirty = True
 
                                 self._ip = Input(repr(target), cb)
 
@@ -143,15 +159,14 @@ class GameApp:
                     elif event.key == pygame.K_3:
                         global o
                         o = Output(self._plat_init_args)
-                        self.dump_edmem()
                     elif event.key == pygame.K_4:
                         for idx, target in enumerate(self._plat_init_args):
                             if Platform(*target).rect.collidepoint(xy):
-                                del self._plat_init_args[idx]
+                                self._journal.delete(idx)
                                 if self._ip is not None:
                                     self._ip.destroy()
                                     self._ip = None
-                                self.dump_edmem()
+                                self._platforms_dirty = True
 
                 for handler in self._event_handlers:
                     try:
@@ -165,9 +180,6 @@ class GameApp:
             if not self.is_paused:
                 self.update()
             self._camera.update()
-            if len(self._spears) > 5:
-                sorted_spears = sorted(self._spears, key=lambda s: s.creation_time)
-                sorted_spears[0].kill()
 
             if self._player.rect.y > 1000 and not self._was_game_over:
                 self._ui.show_game_over()
@@ -199,12 +211,51 @@ class GameApp:
 
     def stop(self):
         self._is_running = False
+        self._journal.close()
         self._root.destroy()
 
-    def dump_edmem(self):
-        with open('edmem', 'w') as f:
-            f.write(repr(self._plat_init_args))
+    def resize(self, w, h):
+        self._camera.resize(w, h)
+
+    def restart(self):
+        # Платформы редактора пересобираются отдельно, так что полная перезагрузка дешева
+        self.reload()
+
+    def quick_save(self):
+        self._quick_snapshot = WorldSnapshot.capture(
+            self._player, self._enemies, self._spears, self._camera
+        )
+
+    def quick_load(self):
+        if self._quick_snapshot is not None:
+            self._quick_snapshot.restore(
+                self._player,
+                self._enemies,
+                self._spears,
+                self._camera,
+                self._spear_pool,
+                self._enemy_pool,
+            )
+
+    def rebuild_platforms(self):
+        """Пересобирает платформы и объединенные коллайдеры после правки уровня"""
+        self._platforms = pygame.sprite.Group()
+        for args in self._plat_init_args:
+            # try:
+            p = Platform(*args)
+            # except pygame.error: # out of memory
+            #     ...
+            self._platforms.add(p)
+
+        # Старые коллайдеры убиваем, чтобы спавшие на них тела проснулись
+        self._colliders.empty()
+        self._colliders = build_static_colliders(self._platforms)
+        self._world.set_static(self._colliders)
+        # Граф пересчитывает ребра только для изменившихся поверхностей
+        self._navigation.update(self._colliders)
+        self._platforms_dirty = False
 
     def update(self):
-        group = pygame.sprite.Group(self._player, self._enemies, *self._platforms, self._spears)
-        group.update(self._dt, group)
+        group = pygame.sprite.Group(self._player, self._enemies, self._spears)
+        self._world.rebuild(group)
+        group.update(self._dt, self._world)
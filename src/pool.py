@@ -0,0 +1,115 @@
+import abc
+
+import pygame
+
+
+class Poolable(abc.ABC):
+    """
+    Примесь для сущностей, которые можно переиспользовать через EntityPool.
+
+    Должна стоять в списке базовых классов раньше pygame.sprite.Sprite,
+    чтобы перехватывать kill(): убитая сущность сама возвращается в свой пул.
+    Наследник обязан реализовать reset() с теми же аргументами, что и __init__.
+    """
+
+    _pool = None
+    _in_pool = False
+
+    @abc.abstractmethod
+    def reset(self, *args):
+        """Возвращает сущность в начальное состояние (аргументы - как у __init__)"""
+
+    def kill(self):
+        super().kill()
+        if self._pool is not None and not self._in_pool:
+            self._pool.release(self)
+
+
+class EntityPool:
+    def __init__(self, factory, size=32):
+        """
+        Пул переиспользуемых сущностей
+
+        Args:
+            factory: класс (или функция), создающий новую сущность из аргументов acquire()
+            size: сколько свободных сущностей пул хранит одновременно
+        """
+        self._factory = factory
+        self._free = []
+        self.size = size
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self, *args):
+        """Возвращает сущность из пула (сброшенную через reset) или создает новую"""
+        if self._free:
+            entity = self._free.pop()
+            entity._in_pool = False
+            entity.reset(*args)
+        else:
+            entity = self._factory(*args)
+            entity._pool = self
+        return entity
+
+    def release(self, entity):
+        """Возвращает сущность в пул; лишние сверх size просто отдаются сборщику мусора"""
+        if entity._in_pool:
+            return
+        entity._in_pool = True
+        if len(self._free) < self.size:
+            self._free.append(entity)
+
+    def clear(self):
+        self._free.clear()
+
+
+class RingGroup(pygame.sprite.Group):
+    """
+    Группа с ограниченной вместимостью на кольцевом буфере.
+
+    При добавлении спрайта сверх capacity убивается самый старый из них,
+    поэтому сортировать группу по времени создания не требуется.
+    """
+
+    def __init__(self, capacity, *sprites):
+        self._ring = [None] * capacity
+        self._slots = {}
+        self._head = 0
+        super().__init__(*sprites)
+
+    @property
+    def capacity(self):
+        return len(self._ring)
+
+    def add_internal(self, sprite, layer=None):
+        if sprite in self._slots:
+            return
+
+        if self._ring[self._head] is not None and len(self._slots) < len(self._ring):
+            # Кто-то был удален из середины кольца - сдвигаем живых к началу
+            self._compact()
+
+        oldest = self._ring[self._head]
+        if oldest is not None:
+            oldest.kill()
+
+        self._ring[self._head] = sprite
+        self._slots[sprite] = self._head
+        self._head = (self._head + 1) % len(self._ring)
+        super().add_internal(sprite, layer)
+
+    def remove_internal(self, sprite):
+        slot = self._slots.pop(sprite, None)
+        if slot is not None:
+            self._ring[slot] = None
+        super().remove_internal(sprite)
+
+    def _compact(self):
+        capacity = len(self._ring)
+        order = [self._ring[(self._head + i) % capacity] for i in range(capacity)]
+        order = [sprite for sprite in order if sprite is not None]
+
+        self._ring = order + [None] * (capacity - len(order))
+        self._slots = {sprite: slot for slot, sprite in enumerate(order)}
+        self._head = len(order) % capacity
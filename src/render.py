@@ -0,0 +1,184 @@
+import math
+import weakref
+
+import pygame
+from pygame._sdl2.video import Renderer, Texture, Window
+
+WINDOW_FLAGS = pygame.RESIZABLE | pygame.DOUBLEBUF | pygame.HWSURFACE | pygame.HWACCEL
+LETTERBOX_COLOR = '#000000'
+
+
+def fit_rect(resolution, size):
+    """
+    Где в окне размера size показывать кадр размера resolution
+
+    Кадр увеличивается в целое число раз (пиксели остаются квадратными)
+    и ставится по центру; если окно меньше кадра, кадр уменьшается
+    с сохранением пропорций.
+    """
+    scale = min(size[0] / resolution[0], size[1] / resolution[1])
+    if scale >= 1:
+        scale = math.floor(scale)
+    rect = pygame.Rect(
+        0, 0, max(1, int(resolution[0] * scale)), max(1, int(resolution[1] * scale))
+    )
+    rect.center = (size[0] // 2, size[1] // 2)
+    return rect
+
+
+class SurfaceRenderer:
+    def __init__(self, size, title, resolution=None):
+        """
+        Отрисовка программными blit на поверхность окна (по умолчанию)
+
+        Если задано resolution, мир рисуется в отдельную поверхность этого
+        размера и затем растягивается на окно по fit_rect (без сглаживания):
+        число и площадь blit спрайтов не зависят от размера окна.
+
+        Args:
+            size: начальный размер окна
+            title: заголовок окна
+            resolution: логическое разрешение мира или None - размер окна
+        """
+        pygame.display.set_mode(size, WINDOW_FLAGS, vsync=1)
+        pygame.display.set_caption(title)
+        # Интерфейс рисуется поверх мира в разрешении окна
+        self.overlay = pygame.display.get_surface()
+        self.resolution = resolution
+        self._world = self.overlay if resolution is None else pygame.Surface(resolution).convert()
+
+    @property
+    def view_size(self):
+        """Размер видимой области мира"""
+        return self._world.get_size()
+
+    def resize(self, size):
+        pass  # Поверхность окна pygame меняет сам
+
+    def begin(self, color):
+        self._world.fill(color)
+
+    def draw_sprites(self, sprites, camera):
+        for sprite in sprites:
+            self._world.blit(sprite.image, camera.apply(sprite))
+
+    def draw_particles(self, particles, camera):
+        particles.draw(self._world, camera.camera_rect.topleft)
+
+    def end_world(self):
+        """Выводит кадр мира в окно; после этого можно рисовать интерфейс"""
+        if self.resolution is None:
+            return
+        rect = fit_rect(self.resolution, self.overlay.get_size())
+        self.overlay.fill(LETTERBOX_COLOR)
+        pygame.transform.scale(self._world, rect.size, self.overlay.subsurface(rect))
+
+    def present(self):
+        pygame.display.flip()
+
+
+class TextureRenderer:
+    def __init__(self, size, title, accelerated=-1, resolution=None):
+        """
+        Отрисовка через SDL Renderer: спрайты - копии текстур
+
+        Каждая поверхность (ассеты из get_image, готовые изображения платформ)
+        загружается в текстуру один раз, при первой отрисовке; текстура живет,
+        пока жива поверхность. Повернутое копье рисуется текстурой исходного
+        изображения с углом, а не новой поверхностью на каждый угол. Интерфейс
+        по-прежнему рисуется на поверхность (overlay) и выводится поверх мира
+        одной потоковой текстурой; так же, одним слоем, выводятся частицы.
+
+        Без видеокарты SDL сам выбирает программный рендерер; его можно задать
+        явно переменной окружения SDL_RENDER_DRIVER=software.
+
+        С resolution мир рисуется в целевую текстуру этого размера, которая
+        затем растягивается на окно по fit_rect (SDL по умолчанию масштабирует
+        без сглаживания).
+
+        Args:
+            size: начальный размер окна
+            title: заголовок окна
+            accelerated: 1 - только аппаратный, 0 - программный, -1 - какой найдется
+            resolution: логическое разрешение мира или None - размер окна
+        """
+        self.window = Window(title, size, resizable=True)
+        self.renderer = Renderer(
+            self.window, accelerated=accelerated, vsync=True, target_texture=resolution is not None
+        )
+        self.resolution = resolution
+        self._world = None if resolution is None else Texture(self.renderer, resolution, target=True)
+        self._textures = weakref.WeakKeyDictionary()
+        self._particle_layer = None
+        self.resize(size)
+
+    @property
+    def view_size(self):
+        """Размер видимой области мира"""
+        return self.overlay.get_size() if self.resolution is None else self.resolution
+
+    def _layer(self, size):
+        """Прозрачная поверхность и потоковая текстура для ее вывода"""
+        texture = Texture(self.renderer, size, streaming=True)
+        texture.blend_mode = pygame.BLENDMODE_BLEND
+        return pygame.Surface(size, pygame.SRCALPHA), texture
+
+    def resize(self, size):
+        self.overlay, self._overlay_texture = self._layer(size)
+        if self.resolution is None or self._particle_layer is None:
+            # Частицы рисуются в координатах мира - слой размером с видимую область
+            self._particle_layer, self._particle_texture = self._layer(self.view_size)
+
+    def texture(self, surface):
+        """Текстура поверхности; загружается при первом обращении"""
+        texture = self._textures.get(surface)
+        if texture is None:
+            texture = self._textures[surface] = Texture.from_surface(self.renderer, surface)
+        return texture
+
+    def begin(self, color):
+        self.renderer.target = self._world
+        self.renderer.draw_color = color
+        self.renderer.clear()
+        self.overlay.fill((0, 0, 0, 0))
+
+    def draw_sprites(self, sprites, camera):
+        for sprite in sprites:
+            rect = camera.apply(sprite)
+            angle = getattr(sprite, 'angle', 0)
+            if angle:
+                # SDL вращает по часовой стрелке, pygame.transform.rotate - против
+                original = sprite.original_image
+                dstrect = original.get_frect(center=rect.center)
+                self.texture(original).draw(dstrect=dstrect, angle=-angle)
+            else:
+                self.texture(sprite.image).draw(dstrect=rect)
+
+    def draw_particles(self, particles, camera):
+        # Тысячи копий текстур дороже, чем fblits в один слой и одна загрузка
+        if not particles.count:
+            return
+        self._particle_layer.fill((0, 0, 0, 0))
+        particles.draw(self._particle_layer, camera.camera_rect.topleft)
+        self._particle_texture.update(self._particle_layer)
+        self._particle_texture.draw()
+
+    def end_world(self):
+        """Выводит кадр мира в окно; после этого можно рисовать интерфейс"""
+        if self._world is None:
+            return
+        self.renderer.target = None
+        self.renderer.draw_color = LETTERBOX_COLOR
+        self.renderer.clear()
+        self._world.draw(dstrect=fit_rect(self.resolution, self.window.size))
+
+    def present(self):
+        self._overlay_texture.update(self.overlay)
+        self._overlay_texture.draw()
+        self.renderer.present()
+
+
+RENDERERS = {
+    'surface': SurfaceRenderer,
+    'texture': TextureRenderer,
+}
@@ -0,0 +1,250 @@
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from .ai import STATE_SIZE
+
+MAGIC = b'TJRB'
+VERSION = 1
+
+_HEADER = np.dtype(
+    [
+        ('magic', 'S4'),
+        ('version', '<u4'),
+        ('capacity', '<i8'),
+        ('state_size', '<i8'),
+        ('cursor', '<i8'),
+        ('size', '<i8'),
+        ('max_priority', '<f8'),
+    ]
+)
+_HEADER_SIZE = 64  # Заголовок с запасом, колонки выровнены по 64 байта
+
+Batch = namedtuple(
+    'Batch', 'states actions rewards next_states dones indices weights'
+)
+
+
+def _align(offset):
+    return (offset + 63) // 64 * 64
+
+
+class ReplayBuffer:
+    def __init__(self, path, capacity=1_000_000, state_size=STATE_SIZE, batch_size=64):
+        """
+        Буфер опыта (state, action, reward, next_state, done) в файле, отображенном в память
+
+        Каждое поле хранится отдельной колонкой заранее выделенного размера, так что
+        запись - это присваивание по индексу, а чтение не загружает файл в память целиком.
+        Когда буфер заполнен, новые переходы затирают самые старые (по кругу).
+        Приоритеты хранятся в дереве сумм в том же файле.
+
+        Args:
+            path: путь к файлу; существующий файл открывается и дописывается
+            capacity: вместимость для нового файла (у существующего берется из заголовка)
+            state_size: размер вектора состояния
+            batch_size: размер буферов, в которые sample пишет выборку
+        """
+        self.path = Path(path)
+        if self.path.exists():
+            header = np.memmap(self.path, _HEADER, 'r', shape=())
+            if header['magic'] != MAGIC or header['version'] != VERSION:
+                raise ValueError(f'{self.path} is not a replay buffer of version {VERSION}')
+            if header['state_size'] != state_size:
+                raise ValueError(
+                    f'{self.path} stores states of size {header["state_size"]}, not {state_size}'
+                )
+            capacity = int(header['capacity'])
+            del header
+            mode = 'r+'
+        else:
+            mode = 'w+'
+
+        self.capacity = capacity
+        self.state_size = state_size
+
+        # Листья дерева сумм - степень двойки не меньше capacity
+        self._leaves = 1 << max(0, (capacity - 1).bit_length())
+
+        columns = (
+            ('states', np.float32, (capacity, state_size)),
+            ('actions', np.int32, (capacity,)),
+            ('rewards', np.float32, (capacity,)),
+            ('next_states', np.float32, (capacity, state_size)),
+            ('dones', np.bool_, (capacity,)),
+            ('_tree', np.float64, (2 * self._leaves,)),
+        )
+
+        offsets = []
+        offset = _HEADER_SIZE
+        for _, dtype, shape in columns:
+            offsets.append(offset)
+            offset = _align(offset + np.dtype(dtype).itemsize * int(np.prod(shape)))
+
+        self._file = np.memmap(self.path, np.uint8, mode, shape=(offset,))
+        self._header = self._file[: _HEADER.itemsize].view(_HEADER).reshape(())
+        for (name, dtype, shape), start in zip(columns, offsets):
+            size = np.dtype(dtype).itemsize * int(np.prod(shape))
+            setattr(self, name, self._file[start : start + size].view(dtype).reshape(shape))
+
+        if mode == 'w+':
+            self._header['magic'] = MAGIC
+            self._header['version'] = VERSION
+            self._header['capacity'] = capacity
+            self._header['state_size'] = state_size
+            self._header['max_priority'] = 1.0
+
+        self._batch_size = 0
+        self._allocate_batch(batch_size)
+
+    def _allocate_batch(self, batch_size):
+        self._batch_size = batch_size
+        self._batch = Batch(
+            np.empty((batch_size, self.state_size), np.float32),
+            np.empty(batch_size, np.int32),
+            np.empty(batch_size, np.float32),
+            np.empty((batch_size, self.state_size), np.float32),
+            np.empty(batch_size, np.bool_),
+            np.empty(batch_size, np.int64),
+            np.empty(batch_size, np.float32),
+        )
+
+    def __len__(self):
+        return int(self._header['size'])
+
+    @property
+    def cursor(self):
+        """Индекс, куда попадет следующий переход"""
+        return int(self._header['cursor'])
+
+    def append(self, state, action, reward, next_state, done):
+        """Дописывает один переход (по кругу поверх самого старого, если буфер полон)"""
+        i = self.cursor
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self._set_priorities(np.array([i]), self._header['max_priority'])
+        self._advance(1)
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        """Дописывает пачку переходов одним присваиванием на колонку"""
+        count = len(actions)
+        if count == 0:
+            return
+        if count > self.capacity:
+            # В буфер поместятся только последние capacity переходов
+            skip = count - self.capacity
+            states, actions, rewards, next_states, dones = (
+                column[skip:] for column in (states, actions, rewards, next_states, dones)
+            )
+            self._advance(skip)
+            count = self.capacity
+
+        indices = (self.cursor + np.arange(count)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self._set_priorities(indices, self._header['max_priority'])
+        self._advance(count)
+
+    def _advance(self, count):
+        self._header['cursor'] = (self.cursor + count) % self.capacity
+        self._header['size'] = min(self.capacity, len(self) + count)
+
+    def window(self, start, count):
+        """
+        Непрерывный кусок переходов без копирования (представления memmap)
+
+        Returns:
+            tuple: (states, actions, rewards, next_states, dones)
+        """
+        end = min(start + count, len(self))
+        return (
+            self.states[start:end],
+            self.actions[start:end],
+            self.rewards[start:end],
+            self.next_states[start:end],
+            self.dones[start:end],
+        )
+
+    def sample(self, batch_size=None, rng=None, prioritized=False, beta=0.4):
+        """
+        Случайная выборка переходов
+
+        Переходы собираются np.take прямо в заранее выделенные буферы, поэтому
+        вызов не создает новых массивов; буферы перезаписываются следующей выборкой.
+
+        Args:
+            batch_size: размер выборки (по умолчанию заданный в конструкторе)
+            rng: numpy.random.Generator
+            prioritized: выбирать пропорционально приоритетам (иначе равномерно)
+            beta: степень поправочных весов важности для приоритетной выборки
+
+        Returns:
+            Batch: колонки выборки, индексы и веса важности (1 при равномерной)
+        """
+        size = len(self)
+        if size == 0:
+            raise ValueError('replay buffer is empty')
+
+        rng = np.random.default_rng() if rng is None else rng
+        batch_size = batch_size or self._batch_size
+        if batch_size > self._batch_size:
+            self._allocate_batch(batch_size)
+        batch = Batch(*(column[:batch_size] for column in self._batch))
+
+        if prioritized:
+            self._sample_tree(rng, batch.indices)
+            np.minimum(batch.indices, size - 1, out=batch.indices)
+            probs = self._tree[self._leaves + batch.indices] / self._tree[1]
+            np.power(size * probs, -beta, out=batch.weights, casting='unsafe')
+            np.divide(batch.weights, batch.weights.max(), out=batch.weights)
+        else:
+            batch.indices[:] = rng.integers(0, size, batch_size)
+            batch.weights.fill(1)
+
+        np.take(self.states, batch.indices, axis=0, out=batch.states)
+        np.take(self.actions, batch.indices, out=batch.actions)
+        np.take(self.rewards, batch.indices, out=batch.rewards)
+        np.take(self.next_states, batch.indices, axis=0, out=batch.next_states)
+        np.take(self.dones, batch.indices, out=batch.dones)
+        return batch
+
+    def update_priorities(self, indices, priorities, alpha=0.6, eps=1e-6):
+        """Обновляет приоритеты переходов (обычно по ошибке обучения)"""
+        values = (np.abs(priorities) + eps) ** alpha
+        self._header['max_priority'] = max(float(self._header['max_priority']), values.max())
+        self._set_priorities(np.asarray(indices), values)
+
+    def _set_priorities(self, indices, values):
+        """Пишет листья и пересчитывает суммы вверх по дереву, уровень за уровнем"""
+        nodes = indices + self._leaves
+        self._tree[nodes] = values
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self._tree[nodes] = self._tree[2 * nodes] + self._tree[2 * nodes + 1]
+
+    def _sample_tree(self, rng, out):
+        """Стратифицированный спуск по дереву сумм сразу для всей выборки"""
+        count = len(out)
+        total = self._tree[1]
+        targets = (np.arange(count) + rng.random(count)) * (total / count)
+
+        nodes = np.ones(count, np.int64)
+        while nodes[0] < self._leaves:
+            left = 2 * nodes
+            left_sums = self._tree[left]
+            go_right = targets > left_sums
+            targets -= np.where(go_right, left_sums, 0)
+            nodes = left + go_right
+
+        np.subtract(nodes, self._leaves, out=out)
+
+    def flush(self):
+        """Сбрасывает записанное на диск (заголовок с курсором - тоже)"""
+        self._file.flush()
@@ -0,0 +1,173 @@
+import numpy as np
+
+# Состояние игрока и врагов; facing: -1 влево, 1 вправо; action: -1 - нет решения ИИ
+BODY = np.dtype(
+    [
+        ('x', 'f8'),
+        ('y', 'f8'),
+        ('vx', 'f8'),
+        ('vy', 'f8'),
+        ('health', 'f8'),
+        ('grounded', '?'),
+        ('facing', 'i1'),
+        ('action', 'i1'),
+        ('anim_time', 'f8'),
+    ]
+)
+# Состояние копий; owner: -1 - нет, 0 - игрок, k + 1 - k-й враг снимка
+SPEAR = np.dtype(
+    [
+        ('x', 'f8'),
+        ('y', 'f8'),
+        ('vx', 'f8'),
+        ('vy', 'f8'),
+        ('angle', 'f8'),
+        ('stuck', '?'),
+        ('owner', 'i4'),
+    ]
+)
+
+
+def _body_row(body):
+    action = getattr(body, 'last_action', None)
+    return (
+        *body.rect.topleft,
+        *body.velocity,
+        body.health,
+        body.is_grounded,
+        -1 if body._facing == 'left' else 1,
+        -1 if action is None else action,
+        body.animator.time,
+    )
+
+
+def _restore_body(body, row, clip):
+    body._facing = 'left' if row['facing'] < 0 else 'right'
+    body.animator.clip = clip
+    body.animator.time = float(row['anim_time'])
+    body.show_frame()
+    body.rect.topleft = (row['x'], row['y'])
+    body.velocity.update(row['vx'], row['vy'])
+    body.acceleration.update(0, 0)
+    body.health = float(row['health'])
+    body.is_grounded = bool(row['grounded'])
+    body.support = None
+    body.lod_elapsed = 0.0
+    body.wake()
+
+
+class WorldSnapshot:
+    """
+    Снимок динамической части мира в плоских массивах.
+
+    Сохраняются положения, скорости, здоровье, флаги копий и их владельцы,
+    положение камеры, анимации и записи неактивных чанков. Изображения
+    не копируются - снимок держит ссылки на поверхности копий и общие
+    анимации игрока и врагов. Восстановление
+    переиспользует живые спрайты (недостающие берутся из пулов, лишние уходят
+    в пулы), а платформы, коллайдеры и интерфейс не трогает, поэтому оно
+    почти мгновенно: годится для перезапуска уровня, отката при отладке
+    и многократных прогонов ИИ с одного состояния.
+    """
+
+    def __init__(self, player, enemies, spears, clips, spear_images, spear_masks, camera, chunks):
+        self.player = player
+        self.enemies = enemies
+        self.spears = spears
+        self._clips = clips  # Анимации игрока и врагов - по порядку
+        self._spear_images = spear_images
+        self._spear_masks = spear_masks
+        self.camera = camera
+        self._chunks = chunks
+
+    @classmethod
+    def capture(cls, player, enemies, spears, camera, chunks=None):
+        """
+        Снимает состояние мира
+
+        Args:
+            player: игрок
+            enemies, spears: группы врагов и копий
+            camera: Camera
+            chunks: ChunkManager (необязательно)
+        """
+        enemies = enemies.sprites()
+        spears = spears.sprites()
+        owners = {player: 0, **{enemy: i + 1 for i, enemy in enumerate(enemies)}}
+
+        return cls(
+            np.array([_body_row(player)], BODY)[0],
+            np.array([_body_row(enemy) for enemy in enemies], BODY),
+            np.array(
+                [
+                    (
+                        *spear.rect.topleft,
+                        *spear.velocity,
+                        spear.angle,
+                        spear.is_stuck,
+                        owners.get(spear.owner, -1),
+                    )
+                    for spear in spears
+                ],
+                SPEAR,
+            ),
+            [body.animator.clip for body in (player, *enemies)],
+            [spear.image for spear in spears],
+            [spear.mask for spear in spears],
+            (camera.camera_rect.topleft, tuple(camera.offset)),
+            None if chunks is None else chunks.save_state(),
+        )
+
+    def restore(self, player, enemies, spears, camera, spear_pool, enemy_pool, chunks=None):
+        """Возвращает мир в состояние снимка, переиспользуя существующие спрайты"""
+        _restore_body(player, self.player, self._clips[0])
+
+        live_enemies = self._reuse(enemies, len(self.enemies))
+        restored_enemies = []
+        for i, row in enumerate(self.enemies):
+            if i < len(live_enemies):
+                enemy = live_enemies[i]
+                enemy.reset(row['x'], row['y'])
+            else:
+                enemy = enemy_pool.acquire(row['x'], row['y'])
+            _restore_body(enemy, row, self._clips[1 + i])
+            enemy.last_action = None if row['action'] < 0 else int(row['action'])
+            enemies.add(enemy)
+            restored_enemies.append(enemy)
+
+        owners = [player, *restored_enemies]
+        live_spears = self._reuse(spears, len(self.spears))
+        for i, row in enumerate(self.spears):
+            owner = owners[row['owner']] if row['owner'] >= 0 else None
+            position, velocity = (row['x'], row['y']), (row['vx'], row['vy'])
+            if i < len(live_spears):
+                spear = live_spears[i]
+                spear.reset(position, velocity, owner)
+            else:
+                spear = spear_pool.acquire(position, velocity, owner)
+
+            spear.velocity.update(velocity)
+            spear.angle = float(row['angle'])
+            spear.image = self._spear_images[i]
+            spear.mask = self._spear_masks[i]
+            spear.rect.size = spear.image.get_size()
+            spear.rect.topleft = position
+            if row['stuck']:
+                spear.stick()
+            spears.add(spear)
+
+        camera.camera_rect.topleft, camera_offset = self.camera
+        camera.offset.update(camera_offset)
+
+        if chunks is not None and self._chunks is not None:
+            chunks.load_state(self._chunks, enemies, spears)
+
+    @staticmethod
+    def _reuse(group, count):
+        """Оставляет в группе не больше count спрайтов (лишние уходят в пулы) и опустошает ее"""
+        sprites = group.sprites()
+        for sprite in sprites[count:]:
+            sprite.kill()
+        # Порядок в группе важен (ИИ, кольцо копий) - перекладываем заново
+        group.empty()
+        return sprites[:count]
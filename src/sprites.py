@@ -1,11 +1,19 @@
-import time
 import pygame
 from pygame.math import Vector2
 
-from .util import get_image
+from . import collision
+from .ai import ACTION_JUMP, ACTION_LEFT, ACTION_RIGHT
+from .animation import Animation, Animator, FrameSheet
+from .particles import BLOOD, DUST
+from .pool import Poolable
+from .util import get_image, optimize_surface
 
 
 class Platform(pygame.sprite.Sprite):
+    category = collision.STATIC
+    owner = None
+    is_sleeping = False
+
     def __init__(self, x, y, tile_w, tile_h):
         """
         Создает платформу из составных текстур
@@ -45,6 +53,16 @@ class Platform(pygame.sprite.Sprite):
             )
         }
 
+    @staticmethod
+    def measure(tile_w, tile_h):
+        """Размер платформы (ширина, высота) без построения изображения"""
+        corner = get_image('platform/topleft.png').get_size()
+        side = get_image('platform/top.png').get_width(), get_image('platform/left.png').get_height()
+        return (
+            2 * corner[0] + tile_w * side[0],
+            2 * corner[1] + tile_h * side[1],
+        )
+
     def build_image(self):
         """Создает изображение платформы из составных частей"""
         # Получаем размеры текстур
@@ -102,11 +120,31 @@ class Platform(pygame.sprite.Sprite):
 
         self.image.blit(self._texs['bottomright'], (x, y))
 
+        # Обычно платформа полностью непрозрачна - тогда blit без попиксельной альфы
+        self.image = optimize_surface(self.image)
+
 
 class Physical(pygame.sprite.Sprite):
-    def __init__(self, *groups):
+    # Категория тела и маска категорий, с которыми оно сталкивается (см. collision)
+    category = 0
+    collides_with = collision.ALL
+
+    # Засыпание: опертое тело, чья скорость ниже sleep_speed (px/s) дольше sleep_time
+    # секунд подряд, перестает симулироваться, пока его не разбудят
+    sleep_speed = 1.0
+    sleep_time = 1 / 6
+
+    # Непрерывные столкновения (swept AABB): тело не проскакивает тонкие препятствия
+    # при большой скорости или длинном кадре; sweep_iterations - сколько раз за шаг
+    # тело может скользнуть вдоль поверхности после удара
+    continuous = False
+    sweep_iterations = 3
+
+    def __init__(self, *groups, effects=None):
         pygame.sprite.Sprite.__init__(self, *groups)
         self.rect = pygame.FRect()
+        # Система частиц для эффектов (particles.ParticleSystem); None - без эффектов
+        self.effects = effects
 
         self.velocity = Vector2(0, 0)
         self.acceleration = Vector2(0, 0)
@@ -115,30 +153,209 @@ class Physical(pygame.sprite.Sprite):
         self.max_speed = 300
 
         self.is_grounded = False
+        self.owner = None  # С владельцем (и его владельцем) тело не сталкивается
+
+        self.is_sleeping = False
+        self._still_time = 0.0
+        self.support = None  # На чем тело стоит (или во что воткнулось)
+        self._support_rect = pygame.FRect()
+
+        self.lod_elapsed = 0.0  # Время, накопленное с прошлого шага (см. lod.SimulationLOD)
+
+    def update(self, dt: float, world: collision.CollisionWorld, cb=lambda sprite: True) -> bool:
+        """
+        Шаг симуляции тела
+
+        Args:
+            dt: шаг по времени в секундах
+            world: широкая фаза, уже отфильтровавшая пары по категориям и владельцам
+            cb: игровой колбэк для каждого кандидата; False - не разрешать столкновение
+
+        Returns:
+            bool: было ли хотя бы одно столкновение
+        """
+        if self.is_sleeping:
+            if not self._is_support_changed():
+                return False
+            self.wake()
 
-    def update(self, dt: float, group: pygame.sprite.Group, cb=lambda sprite: True) -> bool:
         self.velocity += self.acceleration * dt
         self.velocity += self.gravity * dt
 
         if self.velocity.length() > self.max_speed:
             self.velocity.scale_to_length(self.max_speed)
 
-        self.rect.move_ip(self.velocity * dt)
+        self.is_grounded = False
+        if self.continuous:
+            is_there_cols = self.sweep(self.velocity * dt, world, cb)
+        else:
+            self.rect.move_ip(self.velocity * dt)
+            is_there_cols = False
 
-        is_there_cols = self.check_vertical_collisions(group, cb)
-        is_there_cols = self.check_horizontal_collisions(group, cb) or is_there_cols
+        is_there_cols = self.check_vertical_collisions(world, cb) or is_there_cols
+        is_there_cols = self.check_horizontal_collisions(world, cb) or is_there_cols
 
-        self.acceleration = Vector2(0, 0)
+        self.acceleration.update(0, 0)
+        self._update_sleep(dt)
         return is_there_cols
 
-    def check_horizontal_collisions(self, group, cb) -> bool:
+    def sweep(self, delta, world, cb) -> bool:
+        """
+        Перемещает тело на delta, останавливаясь на первом препятствии по пути (swept AABB)
+
+        Контакт разрешается так же, как в check_*_collisions: тело прижимается к грани,
+        скорость по оси удара обнуляется, удар сверху делает тело стоящим. Остаток
+        перемещения вдоль другой оси доигрывается (скольжение).
+
+        Returns:
+            bool: был ли удар
+        """
+        remaining = Vector2(delta)
+        ret = False
+
+        for _ in range(self.sweep_iterations):
+            if not remaining:
+                break
+
+            contact = self._first_contact(remaining, world, cb)
+            if contact is None:
+                self.rect.move_ip(remaining)
+                break
+
+            t, axis, sprite = contact
+            self.rect.move_ip(remaining * t)
+            self._on_contact(sprite)
+            ret = True
+
+            if axis == 'y':
+                if remaining.y > 0:  # Падение вниз
+                    self.rect.bottom = sprite.rect.top
+                    self.is_grounded = True
+                    self.set_support(sprite)
+                else:  # Движение вверх
+                    self.rect.top = sprite.rect.bottom
+                self.velocity.y = 0
+                remaining.update(remaining.x * (1 - t), 0)
+            else:
+                if remaining.x > 0:  # Движение вправо
+                    self.rect.right = sprite.rect.left
+                else:  # Движение влево
+                    self.rect.left = sprite.rect.right
+                self.velocity.x = 0
+                remaining.update(0, remaining.y * (1 - t))
+
+        return ret
+
+    def _first_contact(self, delta, world, cb):
+        """Ищет самое раннее принятое колбэком препятствие на пути; (t, ось, спрайт) или None"""
+        area = self.rect.union(self.rect.move(delta))
+        contacts = []
+
+        for sprite in world.query(self, area):
+            # Уже пересекающиеся объекты разрешает обычный (дискретный) проход
+            if self.rect.colliderect(sprite.rect):
+                continue
+
+            toi = self._time_of_impact(delta, sprite.rect)
+            if toi is not None:
+                contacts.append((*toi, sprite))
+
+        contacts.sort(key=lambda contact: contact[0])
+        for t, axis, sprite in contacts:
+            # Колбэк с побочными эффектами (урон) - только для действительно принятого удара
+            if self._accepts_swept_contact(delta, t, axis, sprite) and cb(sprite):
+                return t, axis, sprite
+
+        return None
+
+    def _time_of_impact(self, delta, other):
+        """
+        Время удара (0..1 от delta) о неподвижный прямоугольник методом разделяющих осей
+
+        Returns:
+            tuple: (t, 'x' или 'y') или None, если за шаг удара нет
+        """
+        rect = self.rect
+
+        if delta.x > 0:
+            entry_x = (other.left - rect.right) / delta.x
+            exit_x = (other.right - rect.left) / delta.x
+        elif delta.x < 0:
+            entry_x = (other.right - rect.left) / delta.x
+            exit_x = (other.left - rect.right) / delta.x
+        elif rect.right > other.left and rect.left < other.right:
+            entry_x, exit_x = float('-inf'), float('inf')
+        else:
+            return None
+
+        if delta.y > 0:
+            entry_y = (other.top - rect.bottom) / delta.y
+            exit_y = (other.bottom - rect.top) / delta.y
+        elif delta.y < 0:
+            entry_y = (other.bottom - rect.top) / delta.y
+            exit_y = (other.top - rect.bottom) / delta.y
+        elif rect.bottom > other.top and rect.top < other.bottom:
+            entry_y, exit_y = float('-inf'), float('inf')
+        else:
+            return None
+
+        entry = max(entry_x, entry_y)
+        if entry < 0 or entry > 1 or entry >= min(exit_x, exit_y):
+            return None
+
+        # При ударе точно в угол предпочитаем вертикаль, как и дискретный решатель
+        return entry, 'x' if entry_x > entry_y else 'y'
+
+    def _accepts_swept_contact(self, delta, t, axis, sprite):
+        return True
+
+    def wake(self):
+        """Будит тело: вызывается при контакте, приложенной силе и смене опоры"""
+        self.is_sleeping = False
+        self._still_time = 0.0
+
+    def set_support(self, sprite):
+        """Запоминает опору тела, чтобы проснуться, если она исчезнет или сдвинется"""
+        self.support = sprite
+        self._support_rect.update(sprite.rect)
+
+    def _is_support_changed(self):
+        support = self.support
+        return support is not None and (
+            not support.alive() or support.rect != self._support_rect
+        )
+
+    def _update_sleep(self, dt, supported=None):
+        """
+        Копит время покоя и усыпляет тело, простоявшее sleep_time секунд
+
+        Покой считается, только пока тело опирается (supported, по умолчанию
+        is_grounded): иначе тело в верхней точке прыжка, где скорость почти
+        нулевая, заснуло бы в воздухе.
+        """
+        if supported is None:
+            supported = self.is_grounded
+        if supported and self.velocity.length_squared() < self.sleep_speed * self.sleep_speed:
+            self._still_time += dt
+            if self._still_time >= self.sleep_time:
+                self.is_sleeping = True
+        else:
+            self._still_time = 0.0
+
+    def _on_contact(self, sprite):
+        """Разрешенный контакт будит спящего соседа"""
+        if sprite.is_sleeping:
+            sprite.wake()
+
+    def check_horizontal_collisions(self, world, cb) -> bool:
         """Проверяет коллизии по горизонтали"""
 
-        hits = pygame.sprite.spritecollide(self, group, False)
+        hits = world.query(self)
 
         for sprite in hits:
-            if sprite is self or not cb(sprite):
+            if not cb(sprite):
                 continue
+            self._on_contact(sprite)
 
             if self.velocity.x > 0:  # Движение вправо
                 self.rect.right = sprite.rect.left
@@ -149,18 +366,19 @@ class Physical(pygame.sprite.Sprite):
 
         return bool(hits)
 
-    def check_vertical_collisions(self, group: pygame.sprite.Group, cb) -> bool:
-        self.is_grounded = False
-        hits = pygame.sprite.spritecollide(self, group, False)
+    def check_vertical_collisions(self, world, cb) -> bool:
+        hits = world.query(self)
 
         for sprite in hits:
-            if sprite is self or not cb(sprite):
+            if not cb(sprite):
                 continue
+            self._on_contact(sprite)
 
             if self.velocity.y > 0:  # Падение вниз
                 self.rect.bottom = sprite.rect.top
                 self.velocity.y = 0
                 self.is_grounded = True
+                self.set_support(sprite)
             elif self.velocity.y < 0:  # Прыжок вверх
                 self.rect.top = sprite.rect.bottom
                 self.velocity.y = 0
@@ -169,17 +387,16 @@ class Physical(pygame.sprite.Sprite):
 
 
 class MaskPhysical(Physical):
-    def check_horizontal_collisions(self, group, cb):
+    def check_horizontal_collisions(self, world, cb):
         """Проверяет горизонтальные коллизии маски с прямоугольниками"""
         # Быстрая проверка прямоугольных коллизий
-        potential_hits = pygame.sprite.spritecollide(self, group, False)
+        potential_hits = world.query(self)
         ret = False
 
         for sprite in potential_hits:
-            if sprite is self or not cb(sprite):
-                continue
-
-            if self.check_mask_vs_rect_collision(sprite):
+            # Сначала маска: промах мимо маски не должен вызывать колбэк (урон)
+            if self.check_mask_vs_rect_collision(sprite) and cb(sprite):
+                self._on_contact(sprite)
                 # Определяем направление и корректируем позицию
                 if self.velocity.x > 0:  # Движение вправо
                     self.rect.right = sprite.rect.left
@@ -191,23 +408,22 @@ class MaskPhysical(Physical):
 
         return ret
 
-    def check_vertical_collisions(self, group, cb):
+    def check_vertical_collisions(self, world, cb):
         """Проверяет вертикальные коллизии маски с прямоугольниками"""
         # Быстрая проверка прямоугольных коллизий
-        potential_hits = pygame.sprite.spritecollide(self, group, False)
-        grounded = False
+        potential_hits = world.query(self)
         ret = False
 
         for sprite in potential_hits:
-            if sprite is self or not cb(sprite):
-                continue
-
-            if self.check_mask_vs_rect_collision(sprite):
+            # Сначала маска: промах мимо маски не должен вызывать колбэк (урон)
+            if self.check_mask_vs_rect_collision(sprite) and cb(sprite):
+                self._on_contact(sprite)
                 # Определяем направление и корректируем позицию
                 if self.velocity.y > 0:  # Падение вниз
                     self.rect.bottom = sprite.rect.top
                     self.velocity.y = 0
                     self.is_grounded = True
+                    self.set_support(sprite)
                 elif self.velocity.y < 0:  # Движение вверх
                     self.rect.top = sprite.rect.bottom
                     self.velocity.y = 0
@@ -215,6 +431,34 @@ class MaskPhysical(Physical):
 
         return ret
 
+    def _accepts_swept_contact(self, delta, t, axis, sprite):
+        """
+        Подтверждает удар по маске, как это сделал бы дискретный проход
+
+        Маска проверяется в самой глубокой точке пути внутри препятствия,
+        до которой тело дошло бы без непрерывной проверки, но не насквозь.
+        """
+        old_pos = self.rect.topleft
+        self.rect.move_ip(delta * t)
+
+        if axis == 'y':
+            depth = min(abs(delta.y) * (1 - t), sprite.rect.height - 1)
+            self.rect.y += depth if delta.y > 0 else -depth
+        else:
+            depth = min(abs(delta.x) * (1 - t), sprite.rect.width - 1)
+            self.rect.x += depth if delta.x > 0 else -depth
+
+        # Хотя бы пиксель внутрь, иначе касание граней не даст пересечения масок
+        if depth < 1:
+            if axis == 'y':
+                self.rect.y += 1 if delta.y > 0 else -1
+            else:
+                self.rect.x += 1 if delta.x > 0 else -1
+
+        accepted = self.check_mask_vs_rect_collision(sprite)
+        self.rect.topleft = old_pos
+        return accepted
+
     def check_mask_vs_rect_collision(self, platform):
         """
         Проверяет коллизию маски текущего объекта с прямоугольником платформы
@@ -283,8 +527,11 @@ class MaskPhysical(Physical):
 
 
 class Player(Physical):
-    def __init__(self, x, y):
-        Physical.__init__(self)
+    category = collision.PLAYER
+    clips = None  # Анимации, общие для всех игроков и врагов (см. load_clips)
+
+    def __init__(self, x, y, effects=None):
+        Physical.__init__(self, effects=effects)
 
         # Настройки игрока
         self.jump_force = -400  # Отрицательное значение = вверх
@@ -292,108 +539,241 @@ class Player(Physical):
 
         self._facing = 'right'
 
-        self.image = get_image('player_idle.png')
+        self.animator = Animator(self.load_clips()['idle'])
+        self.image = self.animator.frame()
         self.rect = self.image.get_frect(x=x, y=y)
         self.health = 1
-        self._owned_spears = []
 
         # # Визуализация
         # self.image.fill(self.color)
         # pygame.draw.rect(self.image, (255, 255, 255), (10, 10, 10, 10))  # Глаза
 
-    def move_left(self):
+    @staticmethod
+    def load_clips():
+        """Загружает анимации один раз на всех"""
+        if Player.clips is None:
+            Player.clips = {
+                'idle': Animation(FrameSheet.get('player_idle.png'), fps=1),
+                'run': Animation(FrameSheet.get('player_running_toright.png'), fps=10),
+            }
+        return Player.clips
+
+    def show_frame(self):
+        """Показывает текущий кадр анимации"""
+        image = self.animator.frame(self._facing == 'left')
+        if image is not self.image:
+            self.image = image
+            self.rect.size = image.get_size()
+
+    def move_left(self, wake=True):
         """Движение влево"""
         # if self.is_grounded:
         self.acceleration.x = -self.move_speed
-        self.image = pygame.transform.flip(get_image('player_running_toright.png'), True, False)
-        self.rect = self.image.get_frect(topleft=self.rect.topleft)
+        if wake:
+            self.wake()
         self._facing = 'left'
+        self.animator.play(self.clips['run'])
+        self.show_frame()
 
-    def move_right(self):
+    def move_right(self, wake=True):
         """Движение вправо"""
         # if self.is_grounded:
         self.acceleration.x = self.move_speed
-        self.image = get_image('player_running_toright.png')
-        self.rect = self.image.get_frect(topleft=self.rect.topleft)
+        if wake:
+            self.wake()
         self._facing = 'right'
+        self.animator.play(self.clips['run'])
+        self.show_frame()
 
     def jump(self):
         if self.is_grounded:
             self.velocity.y = self.jump_force
+            self.wake()
 
     def stop_horizontal(self):
         self.acceleration.x = 0
         self.velocity.x = 0
-        self.image = get_image('player_idle.png')
-        self.rect = self.image.get_frect(topleft=self.rect.topleft)
+        self.animator.play(self.clips['idle'])
+        self.show_frame()
 
-    def throw_spear(self, spears_group):
-        spear = Spear((self.rect.x, self.rect.y - 50), self.velocity, self)
-        spears_group.add(spear)
-        self._owned_spears.append(spear)
+    def throw_spear(self, spears_group, pool=None, direction=None):
+        """
+        Бросает копье
 
-    def _on_hit(self, sprite):
-        return sprite not in self._owned_spears
+        Args:
+            spears_group: группа копий (обычно RingGroup, которая сама убирает самые старые)
+            pool: EntityPool копий; если не задан, копье создается заново
+            direction: направление броска (например, из ballistics.aim);
+                по умолчанию - по текущей скорости
+        """
+        pos = (self.rect.x, self.rect.y - 50)
+        if direction is None:
+            direction = self.velocity
+        if pool is None:
+            spear = Spear(pos, direction, self, self.effects)
+        else:
+            spear = pool.acquire(pos, direction, self)
+        spears_group.add(spear)
 
-    def update(self, dt, group):
-        Physical.update(self, dt, group, self._on_hit)
+    def update(self, dt, world):
+        # Свои копья отсеивает широкая фаза (Spear.owner)
+        Physical.update(self, dt, world)
+        # Анимация идет по времени симуляции: кадр - один поиск по индексу
+        self.animator.advance(dt)
+        self.show_frame()
         if self.health < 0:
+            # Эффект - только при первой смерти, пока спрайт еще в группах
+            if self.effects is not None and self.alive():
+                self.effects.emit(self.rect.center, 40, BLOOD, speed=250, lifetime=0.8)
             self.kill()
 
 
-class Spear(MaskPhysical):
-    def __init__(self, pos: Vector2, direction: Vector2, owner: Player):
-        super().__init__()
+class Spear(Poolable, MaskPhysical):
+    category = collision.PROJECTILE
+    collides_with = collision.ALL & ~collision.PROJECTILE
+    continuous = True  # Копье быстрое и тонкое - проверяем весь путь за шаг
+    initial_speed = 500
+    _original_mask = None  # Общая для всех копий маска исходной текстуры
+    # Повернутые текстуры и маски, общие для всех копий: угол округляется
+    # до rotation_step градусов, так что в полете ничего не создается заново
+    rotation_step = 3
+    _rotations = {}
+
+    def __init__(self, pos: Vector2, direction: Vector2, owner: Player, effects=None):
+        super().__init__(effects=effects)
 
         # Загрузка текстуры
         self.original_image = get_image('spear.png')
-        self.image = self.original_image.copy()
-        self.mask = pygame.mask.from_surface(self.image)
-        self.rect = self.image.get_frect(topleft=pos)
-
-        # Расчет начальной скорости
-        if direction.length() > 0:
-            direction.normalize_ip()
-
-        # Начальная скорость
-        initial_speed = 500
-        self.velocity = direction * initial_speed
+        if Spear._original_mask is None:
+            Spear._original_mask = pygame.mask.from_surface(self.original_image)
+
+        self.reset(pos, direction, owner)
+
+    def reset(self, pos: Vector2, direction: Vector2, owner: Player):
+        """Возвращает копье в начальное состояние без новых аллокаций (для EntityPool)"""
+        self.image = self.original_image
+        self.mask = Spear._original_mask
+        self.rect.size = self.image.get_size()
+        self.rect.topleft = pos
+
+        # Начальная скорость по направлению броска (вектор бросающего не меняем)
+        self.velocity.update(direction)
+        if self.velocity.length() > 0:
+            self.velocity.normalize_ip()
+        self.velocity *= self.initial_speed
+        self.acceleration.update(0, 0)
+        self.is_grounded = False
+        self.support = None
+        self.wake()
 
         # Состояние копья
         self._is_stuck = False  # Вонзилось в объект
-        self.creation_time = time.time()
-        self._owner = owner
+        self.angle = 0  # Угол поворота текстуры, градусы
+        self.collides_with = Spear.collides_with
+        self.owner = owner
 
     def _on_hit(self, sprite):
-        if sprite is self._owner or isinstance(sprite, Spear):
-            return False
-
-        if isinstance(sprite, Player):
+        # Владельца и другие копья уже отсеяла широкая фаза, здесь только урон
+        if sprite.category & (collision.PLAYER | collision.ENEMY):
             sprite.health -= 0.1
+            if self.effects is not None and not self._is_stuck:
+                self.effects.emit(self.rect.center, 8, BLOOD, direction=self.angle, spread=45)
 
         return not self._is_stuck
 
-    def update(self, dt, group, cb=None):
+    def _on_contact(self, sprite):
+        super()._on_contact(sprite)
+        if not self._is_stuck:
+            self.set_support(sprite)
+
+    def update(self, dt, world, cb=None):
         """Обновляет состояние копья"""
 
-        old_pos = self.rect.topleft
+        if self._is_stuck:
+            # Воткнувшееся копье не двигается: только ранит тех, кто его касается,
+            # а когда рядом никого нет - засыпает, пока его снова не заденут
+            if not self.is_sleeping:
+                hits = world.query(self, self.rect.inflate(2, 2))
+                for sprite in hits:
+                    self._on_hit(sprite)
+                if hits:
+                    self._still_time = 0.0
+                else:
+                    self._update_sleep(dt, supported=True)
+            return
 
         # Применяем физику (гравитация и движение)
-        if Physical.update(self, dt, group, self._on_hit):
-            self._is_stuck = True
+        if Physical.update(self, dt, world, self._on_hit):
+            self.stick()
+            if self.effects is not None:
+                # Пыль летит назад, против направления полета
+                self.effects.emit(self.rect.center, 12, DUST, direction=self.angle + 180, spread=60)
             return
 
-        if self._is_stuck:
-            self.rect.topleft = old_pos
-
         # Обновляем угол вращения на основе скорости
         if not self._is_stuck and self.velocity.length() > 0:
-            self.image = pygame.transform.rotate(self.original_image, self.velocity.as_polar()[1])
-            self.mask = pygame.mask.from_surface(self.image)
-            self.rect = self.image.get_frect(center=self.rect.center)
+            self.rotate(self.velocity.as_polar()[1])
+
+    @property
+    def is_stuck(self):
+        return self._is_stuck
+
+    def stick(self):
+        """Втыкает копье: дальше оно не двигается и только ранит тех, кто его касается"""
+        self._is_stuck = True
+        self.velocity.update(0, 0)
+        self.collides_with = collision.PLAYER | collision.ENEMY
+
+    def rotate(self, angle):
+        """Поворачивает текстуру копья на angle градусов (с шагом rotation_step)"""
+        step = round(angle / self.rotation_step) % (360 // self.rotation_step)
+        frame = Spear._rotations.get(step)
+        if frame is None:
+            image = pygame.transform.rotate(self.original_image, step * self.rotation_step)
+            frame = Spear._rotations[step] = (image, pygame.mask.from_surface(image))
+        self.angle = step * self.rotation_step
+        self.image, self.mask = frame
+        # Прямоугольник меняем на месте: на него ссылается широкая фаза
+        center = self.rect.center
+        self.rect.size = self.image.get_size()
+        self.rect.center = center
+
+
+class Enemy(Poolable, Player):
+    category = collision.ENEMY
+
+    def __init__(self, x, y, effects=None):
+        super().__init__(x, y, effects)
+        self.last_action = None
+        self.move_left()
 
+    def act(self, action):
+        """
+        Выполняет решение ИИ (одно из ai.ACTION_*)
+
+        ИИ повторяет последнее решение каждый кадр; повтор прикладывает силу,
+        но не будит врага - иначе уперевшийся в стену враг никогда бы не уснул.
+        Будит только смена решения (и сам прыжок).
+        """
+        wake = action != self.last_action
+        self.last_action = action
+        if action == ACTION_LEFT:
+            self.move_left(wake)
+        elif action == ACTION_RIGHT:
+            self.move_right(wake)
+        elif action == ACTION_JUMP:
+            self.jump()
+
+    def reset(self, x, y):
+        """Возвращает врага в начальное состояние без новых аллокаций (для EntityPool)"""
+        self.velocity.update(0, 0)
+        self.acceleration.update(0, 0)
+        self.is_grounded = False
+        self.health = 1
+        self.support = None
+        self.last_action = None
+        self.wake()
 
-class Enemy(Player):
-    def __init__(self, x, y):
-        super().__init__(x, y)
+        self.rect.topleft = (x, y)
+        self.animator.time = 0.0
         self.move_left()
@@ -0,0 +1,299 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+from .ai import BatchedEnemyAI, GeneticTrainer, Perceptron, RewardSystem
+from .checkpoint import Checkpointer, load_population
+from .collision import CollisionWorld, build_static_colliders
+from .level import DEFAULT_LEVEL
+from .sprites import Enemy, Platform, Player
+
+logger = logging.getLogger(__name__)
+
+# Состояние процесса-воркера (мир уровня и веса в общей памяти)
+_worker = None
+
+
+def init_headless():
+    """Инициализирует pygame без окна (нужно для convert_alpha в get_image)"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    if not pygame.get_init():
+        pygame.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+
+class Episode:
+    def __init__(self, level=DEFAULT_LEVEL, steps=600, dt=1 / 30, exploration=0.0):
+        """
+        Безголовый эпизод: один Enemy под управлением сети против Player по сценарию
+
+        Мир (платформы и коллайдеры) строится один раз и переиспользуется
+        во всех эпизодах.
+
+        Args:
+            level: аргументы Platform для каждой платформы уровня
+            steps: максимальное число шагов симуляции
+            dt: шаг симуляции в секундах
+            exploration: вероятность случайного действия врага
+        """
+        self.platforms = pygame.sprite.Group(Platform(*args) for args in level)
+        self.colliders = build_static_colliders(self.platforms)
+        self.world = CollisionWorld()
+        self.world.set_static(self.colliders)
+
+        self.steps = steps
+        self.dt = dt
+        self.exploration = exploration
+
+    def run(self, perceptron, seed=None, replay=None):
+        """
+        Играет эпизод и возвращает суммарную награду из RewardSystem
+
+        Args:
+            perceptron: сеть врага
+            seed: зерно случайности (действия игрока и исследование врага)
+            replay: ReplayBuffer, куда пишутся переходы эпизода (необязательно)
+        """
+        rng = np.random.default_rng(seed)
+        ai = BatchedEnemyAI(perceptron, capacity=1, exploration=self.exploration, rng=rng)
+        rewards = RewardSystem()
+
+        player = Player(200, 100)
+        enemy = Enemy(player.rect.x + 100, player.rect.y - 30)
+        bodies = (player, enemy)
+        enemies = [enemy]
+
+        rewards.last_distance = rewards.calculate_distance(enemy, player)
+        state = ai.collect_states(enemies, player)[0].copy()
+        total = 0.0
+
+        for step in range(self.steps):
+            self._script_player(player, step, rng)
+
+            action = ai.decide_actions(enemies, player)[0]
+            enemy.act(action)
+
+            self.world.rebuild(bodies)
+            for body in bodies:
+                body.update(self.dt, self.world)
+
+            reward = rewards.calculate_reward(enemy, player)
+            total += reward
+
+            # Враг погиб или упал с уровня
+            done = enemy.health < 0 or enemy.rect.y > 1000
+            if replay is not None:
+                next_state = ai.collect_states(enemies, player)[0]
+                replay.append(state, action, reward, next_state, done)
+                state[:] = next_state
+            if done:
+                break
+
+        return total
+
+    def _script_player(self, player, step, rng):
+        """Игрок по сценарию: раз в секунду меняет направление и иногда прыгает"""
+        period = max(1, round(1 / self.dt))
+        if step % period == 0:
+            if rng.random() < 0.5:
+                player.move_left()
+            else:
+                player.move_right()
+            if rng.random() < 0.3:
+                player.jump()
+
+
+def _init_worker(shm_name, shapes, level, steps, dt, exploration):
+    global _worker
+
+    init_headless()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker = {
+        'shm': shm,  # держим ссылку, пока живут представления
+        'tensors': _tensor_views(shm.buf, shapes),
+        'episode': Episode(level, steps, dt, exploration),
+    }
+
+
+def _evaluate_index(task):
+    index, seed = task
+    perceptron = Perceptron.from_weights(*(t[index] for t in _worker['tensors']))
+    return _worker['episode'].run(perceptron, seed)
+
+
+def _tensor_views(buffer, shapes):
+    views = []
+    offset = 0
+    for shape in shapes:
+        count = int(np.prod(shape))
+        views.append(np.ndarray(shape, np.float64, buffer, offset))
+        offset += count * np.dtype(np.float64).itemsize
+    return views
+
+
+class FitnessEvaluator:
+    def __init__(
+        self,
+        trainer: GeneticTrainer,
+        processes=None,
+        level=DEFAULT_LEVEL,
+        steps=600,
+        dt=1 / 30,
+        exploration=0.0,
+        seed=0,
+    ):
+        """
+        Параллельная оценка популяции на пуле процессов
+
+        Каждый воркер один раз строит свой мир уровня, а веса всей популяции лежат
+        в общей памяти: перед оценкой они копируются туда одним memcpy на тензор,
+        задачи же передают только номер сети и зерно.
+
+        Args:
+            trainer: тренер, чьи scores заполняются
+            processes: число процессов (None - по числу ядер, 0 - без пула, в этом процессе)
+            level, steps, dt, exploration: параметры Episode
+            seed: базовое зерно эпизодов
+        """
+        self.trainer = trainer
+        self.seed = seed
+
+        shapes = [t.shape for t in trainer.tensor.tensors]
+        nbytes = sum(t.nbytes for t in trainer.tensor.tensors)
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._tensors = _tensor_views(self._shm.buf, shapes)
+
+        self._episode = None
+        self._pool = None
+        try:
+            if processes == 0:
+                init_headless()
+                self._episode = Episode(level, steps, dt, exploration)
+            else:
+                self._pool = multiprocessing.Pool(
+                    processes,
+                    initializer=_init_worker,
+                    initargs=(self._shm.name, shapes, level, steps, dt, exploration),
+                )
+        except BaseException:
+            # До __enter__ дело не дошло - общую память освобождаем сами
+            self._release_memory()
+            raise
+        self._processes = processes or os.cpu_count() or 1
+
+    def evaluate(self):
+        """Оценивает всю популяцию, записывает и возвращает trainer.scores"""
+        for shared, tensor in zip(self._tensors, self.trainer.tensor.tensors):
+            shared[...] = tensor
+
+        size = len(self.trainer.population)
+        tasks = [(i, (self.seed, self.trainer.generation, i)) for i in range(size)]
+
+        if self._pool is None:
+            scores = [
+                self._episode.run(Perceptron.from_weights(*(t[i] for t in self._tensors)), seed)
+                for i, seed in tasks
+            ]
+        else:
+            chunksize = max(1, size // (4 * self._processes))
+            scores = self._pool.map(_evaluate_index, tasks, chunksize)
+
+        self.trainer.scores[:] = scores
+        return self.trainer.scores
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._release_memory()
+
+    def _release_memory(self):
+        self._tensors = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def train(
+    generations=10,
+    population_size=32,
+    processes=None,
+    steps=600,
+    seed=0,
+    checkpoint=None,
+    checkpoint_every=10,
+    resume=False,
+):
+    """
+    Обучает популяцию: оценка в пуле процессов и эволюция, generations раз
+
+    Args:
+        checkpoint: файл чекпоинта (None - не сохранять)
+        checkpoint_every: сохранять раз в столько поколений (и в конце)
+        resume: продолжить с чекпоинта, если он есть
+    """
+    if resume and checkpoint is not None and os.path.exists(checkpoint):
+        trainer = load_population(checkpoint)
+    else:
+        trainer = GeneticTrainer(population_size, seed=seed)
+    checkpointer = None if checkpoint is None else Checkpointer(checkpoint, checkpoint_every)
+
+    with FitnessEvaluator(trainer, processes, steps=steps, seed=seed) as evaluator:
+        for i in range(generations):
+            start = time.perf_counter()
+            scores = evaluator.evaluate()
+            logger.info(
+                'generation %d: best %.1f, mean %.1f (%.2f s)',
+                trainer.generation,
+                scores.max(),
+                scores.mean(),
+                time.perf_counter() - start,
+            )
+            # Сохраняем до evolve: вместе с популяцией - ее настоящие оценки
+            if checkpointer is not None:
+                checkpointer.maybe_save(trainer, force=i == generations - 1)
+            trainer.evolve()
+
+    return trainer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--population', type=int, default=32)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--steps', type=int, default=600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint', default=None)
+    parser.add_argument('--checkpoint-every', type=int, default=10)
+    parser.add_argument('--resume', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    train(
+        args.generations,
+        args.population,
+        args.processes,
+        args.steps,
+        args.seed,
+        args.checkpoint,
+        args.checkpoint_every,
+        args.resume,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
 import random
+import time
 from pathlib import Path
-from typing import Literal
+from typing import Literal, NamedTuple
 
+import numpy as np
 import pygame
 import pygame._sdl2
 
@@ -29,23 +31,154 @@ def blend(bg: pygame.Color, fg: pygame.Color, alpha: float | None = None) -> pyg
 
 
 _images_cache = {}
+_alpha_kinds = {}
 ASSETS_ROOT=Path('./assets')
 
+AlphaKind = Literal['opaque', 'binary', 'alpha']
+# Tried first when a binary-alpha image needs a colorkey
+COLORKEY_CANDIDATES = ((255, 0, 255), (0, 255, 0), (0, 255, 255))
+
+
+class AssetStats(NamedTuple):
+    name: str
+    size: tuple[int, int]
+    kind: AlphaKind
+    opaque_fraction: float
+    blit_us: float  # One blit of the surface as loaded
+    alpha_blit_us: float  # The same blit with per-pixel alpha, for comparison
+
+
+def alpha_kind(surface: pygame.Surface) -> AlphaKind:
+    '''Classifies a surface by its transparency.
+
+    'opaque' - every pixel is opaque, 'binary' - pixels are either opaque or fully transparent
+    (or the surface already has a colorkey), 'alpha' - there is partial transparency.
+    '''
+
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return 'opaque' if surface.get_colorkey() is None else 'binary'
+
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    try:
+        if (alpha == 0xFF).all():
+            return 'opaque'
+        if ((alpha == 0) | (alpha == 0xFF)).all():
+            return 'binary'
+        return 'alpha'
+    finally:
+        del alpha  # Unlocks the surface
+
+
+def _free_color(surface: pygame.Surface) -> tuple[int, int, int]:
+    '''A color that no visible pixel of the surface has.'''
+
+    rgb = pygame.surfarray.array3d(surface).astype(np.uint32)
+    visible = pygame.surfarray.array_alpha(surface) > 0
+    used = np.unique((rgb[..., 0] << 16 | rgb[..., 1] << 8 | rgb[..., 2])[visible])
+
+    for color in COLORKEY_CANDIDATES:
+        if not np.isin(color[0] << 16 | color[1] << 8 | color[2], used):
+            return color
+    # Among len(used) + 1 colors at least one is free
+    free = int(np.setdiff1d(np.arange(len(used) + 1), used)[0])
+    return free >> 16 & 0xFF, free >> 8 & 0xFF, free & 0xFF
+
+
+def optimize_surface(surface: pygame.Surface, kind: AlphaKind | None = None) -> pygame.Surface:
+    '''Converts a surface to the cheapest display format that keeps its look.
+
+    Opaque surfaces are converted without alpha, binary-alpha ones get a colorkey with RLEACCEL
+    (transparent runs are skipped while blitting), and only surfaces with partial transparency
+    keep per-pixel alpha. Without a display surface (the texture renderer) the surface
+    is returned as is: textures do not depend on the surface format.
+    '''
+
+    if pygame.display.get_surface() is None:
+        return surface
+    if kind is None:
+        kind = alpha_kind(surface)
+
+    if kind == 'opaque':
+        return surface.convert()
+    if kind == 'alpha':
+        return surface.convert_alpha()
+
+    if not surface.get_flags() & pygame.SRCALPHA:
+        colorkey = surface.get_colorkey()
+        image = surface.convert()
+    else:
+        colorkey = _free_color(surface)
+        image = surface.convert()
+        rgb = pygame.surfarray.pixels3d(image)
+        rgb[pygame.surfarray.array_alpha(surface) == 0] = colorkey
+        del rgb
+    image.set_colorkey(colorkey, pygame.RLEACCEL)
+    return image
+
+
+def _blit_time(surface: pygame.Surface, target: pygame.Surface, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        target.blit(surface, (0, 0))
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def asset_stats(repeat: int = 50) -> list[AssetStats]:
+    '''Blit cost of every image loaded by get_image so far, most expensive first.
+
+    Blits are timed onto an opaque surface in the display format, as on the screen.
+    '''
+
+    stats = []
+    for name, image in _images_cache.items():
+        target = pygame.Surface(image.get_size())
+        if pygame.display.get_surface() is not None:
+            target = target.convert()
+        alpha_image = image.convert_alpha() if pygame.display.get_surface() is not None else image
+
+        opaque = pygame.mask.from_surface(image).count() / max(1, image.get_width() * image.get_height())
+        stats.append(
+            AssetStats(
+                name,
+                image.get_size(),
+                _alpha_kinds[name],
+                opaque,
+                _blit_time(image, target, repeat),
+                _blit_time(alpha_image, target, repeat),
+            )
+        )
+    return sorted(stats, key=lambda s: s.blit_us, reverse=True)
+
+
+def format_asset_stats(stats: list[AssetStats]) -> str:
+    lines = [f'{"asset":32} {"size":>9} {"kind":>6} {"opaque":>6} {"blit,us":>8} {"alpha,us":>8}']
+    for s in stats:
+        size = f'{s.size[0]}x{s.size[1]}'
+        lines.append(
+            f'{s.name:32} {size:>9} {s.kind:>6} {s.opaque_fraction:6.0%} {s.blit_us:8.2f} {s.alpha_blit_us:8.2f}'
+        )
+    return '\n'.join(lines)
+
 def get_image(
     name: str,
     scale_to: tuple[int, int] | None = None,
     scale_type: Literal['smooth', 'pixel'] = 'pixel',
 ) -> pygame.Surface | None:
+    '''Loads an image from the assets root, caching it.'''
+
     if name in _images_cache:
         image = _images_cache[name]
     else:
         icon_path = ASSETS_ROOT / name
         try:
-            image = pygame.image.load(icon_path).convert_alpha()
+            image = pygame.image.load(icon_path)
         except IOError:
             # pygame._sdl2.messagebox('Fatal', f'Could not load texture `{name}`\nAssets root: `{ASSETS_ROOT!s}`')
             # raise
             return None
+        _alpha_kinds[name] = alpha_kind(image)
+        # Without a display (texture renderer) the format is set when uploading a texture
+        image = optimize_surface(image, _alpha_kinds[name])
         _images_cache[name] = image
 
     if scale_to is None:
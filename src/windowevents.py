@@ -7,6 +7,7 @@ if TYPE_CHECKING:
 
 from .camera import Camera
 
+from .pool import EntityPool
 from .sprites import Enemy, Player
 
 
@@ -43,21 +44,35 @@ class GameAppEventHandler(BaseEventHandler):
             elif e.key == pygame.K_F5:
                 self._app.update()
             elif e.key == pygame.K_F6:
-                self._app.reload()
+                if e.mod & pygame.KMOD_SHIFT:
+                    self._app.reload()
+                else:
+                    self._app.restart()
+            elif e.key == pygame.K_F7:
+                self._app.quick_save()
+            elif e.key == pygame.K_F8:
+                self._app.quick_load()
 
-        elif e.type == pygame.VIDEORESIZE:
-            self._camera.width = e.w
-            self._camera.height = e.h
+        elif e.type == pygame.WINDOWSIZECHANGED:
+            # Приходит и для окна display, и для окна рендерера текстурами
+            self._app.resize(e.x, e.y)
 
 
 class PlayerMotionEventHandler(BaseEventHandler):
     def __init__(
-        self, player: 'Player', spear_group: pygame.sprite.Group, enemies_group: pygame.sprite.Group
+        self,
+        player: 'Player',
+        spear_group: pygame.sprite.Group,
+        enemies_group: pygame.sprite.Group,
+        spear_pool: EntityPool | None = None,
+        enemy_pool: EntityPool | None = None,
     ):
         self._player = player
         self._actions = set()
         self._spears = spear_group
         self._enemies = enemies_group
+        self._spear_pool = spear_pool
+        self._enemy_pool = enemy_pool
 
     def process_event(self, e: pygame.Event):
         """Обрабатывает события клавиатуры"""
@@ -80,11 +95,15 @@ class PlayerMotionEventHandler(BaseEventHandler):
                 self._actions.add('jump')
 
             elif e.key in (pygame.K_LCTRL, pygame.K_RCTRL):
-                self._player.throw_spear(self._spears)
+                self._player.throw_spear(self._spears, self._spear_pool)
 
             elif e.key == pygame.K_e:
-                e = Enemy(self._player.rect.x + 100, self._player.rect.y - 30)
-                self._enemies.add(e)
+                pos = (self._player.rect.x + 100, self._player.rect.y - 30)
+                if self._enemy_pool is None:
+                    enemy = Enemy(*pos, self._player.effects)
+                else:
+                    enemy = self._enemy_pool.acquire(*pos)
+                self._enemies.add(enemy)
 
         elif e.type == pygame.KEYUP:
             if e.key == pygame.K_a: